@@ -0,0 +1,96 @@
+"""
+Benchmark: event loop lag while articles are parsed for translation.
+
+Each job does the HTML work of translate_item on a synthetic article:
+text segments out, translated segments back in, clean_html of the result.
+Jobs run concurrently while a probe measures how late a 5 ms sleep wakes:
+
+    loop     clean_html on the event loop (previous translate_item)
+    thread   asyncio.to_thread (previous google_translate DOM work)
+    process  services.html_executor.HTMLExecutor process pool
+
+Run from the api directory:
+    python benchmarks/event_loop_lag.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.html_executor import HTMLExecutor  # noqa: E402
+from utils.html_cleaner import (  # noqa: E402
+    clean_html, get_text_segments, replace_text_segments
+)
+
+
+def make_article(paragraphs=300):
+    return ''.join(
+        f'<div class="block"><p>Paragraph {i} with <b>bold</b> text, '
+        f'<a href="https://example.com/{i}">a link</a> and <i>more</i> '
+        f'words to translate.</p><span>Caption {i}</span></div>'
+        for i in range(paragraphs)
+    )
+
+
+def translate_dom(text):
+    segments = get_text_segments(text)
+    translated = [segment.strip().upper() for segment in segments]
+    return clean_html(replace_text_segments(text, translated))
+
+
+async def probe(lags, stop, interval=0.005):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(loop.time() - start - interval, 0))
+
+
+async def run(mode, article, jobs=32, concurrency=8, processes=4):
+    executor = HTMLExecutor(processes if mode == 'process' else 0)
+    if mode == 'process':
+        # Spawning the workers is a one-off cost, keep it out of the run
+        await asyncio.gather(*(
+            executor.run(len, '') for _ in range(processes)
+        ))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def job():
+        async with semaphore:
+            if mode == 'loop':
+                translate_dom(article)
+                await asyncio.sleep(0)
+            else:
+                await executor.run(translate_dom, article)
+
+    lags, stop = [], asyncio.Event()
+    monitor = asyncio.create_task(probe(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(job() for _ in range(jobs)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    executor.shutdown()
+    lags.sort()
+    return elapsed, lags
+
+
+def percentile(values, q):
+    return values[min(int(len(values) * q), len(values) - 1)] * 1e3
+
+
+async def main():
+    article = make_article()
+    print(f'article {len(article) // 1024} KB, 32 jobs, 8 concurrent')
+    print(f'{"mode":<10}{"total":>10}{"p50 lag":>12}{"p99 lag":>12}'
+          f'{"max lag":>12}')
+    for mode in ('loop', 'thread', 'process'):
+        elapsed, lags = await run(mode, article)
+        print(f'{mode:<10}{elapsed:>9.2f}s{percentile(lags, .5):>10.1f}ms'
+              f'{percentile(lags, .99):>10.1f}ms{lags[-1] * 1e3:>10.1f}ms')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
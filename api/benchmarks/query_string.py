@@ -0,0 +1,71 @@
+"""
+Microbenchmarks: utils.query_string.parse vs fast_parse.
+
+Run from the api directory:
+    python benchmarks/query_string.py
+"""
+import os
+import sys
+import timeit
+
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.query_string import parse, fast_parse, _tokenize  # noqa: E402
+
+
+def filters_query(n):
+    params = {}
+    for i in range(n):
+        params[f'filters[{i}][field]'] = 'title'
+        params[f'filters[{i}][operator]'] = 'contains'
+        params[f'filters[{i}][value]'] = f'value {i}'
+    params['orders[0][field]'] = 'created_at'
+    params['orders[0][dir]'] = 'desc'
+    params['skip'] = 0
+    params['limit'] = 100
+    return urlencode(params)
+
+
+CASES = {
+    'plain': 'skip=0&limit=100',
+    'filters_3': filters_query(3),
+    'filters_20': filters_query(20),
+    'nested_or': (
+        'filters[0][logic]=or'
+        '&filters[0][filters][0][field]=status'
+        '&filters[0][filters][0][operator]=eq'
+        '&filters[0][filters][0][value]=NEW'
+        '&filters[0][filters][1][field]=status'
+        '&filters[0][filters][1][operator]=eq'
+        '&filters[0][filters][1][value]=DONE'
+    ),
+}
+
+
+def bench(func, query, number):
+    return min(timeit.repeat(
+        lambda: func(query, normalized=True), number=number, repeat=5
+    )) / number * 1e6
+
+
+def main(number=2000):
+    print(f'{"case":<12}{"parse":>12}{"cold":>12}{"cached":>12}')
+    for name, query in CASES.items():
+        assert parse(query, normalized=True) == \
+            fast_parse(query, normalized=True), name
+        legacy = bench(parse, query, number)
+
+        def cold(q, normalized):
+            _tokenize.cache_clear()
+            return fast_parse(q, normalized=normalized)
+
+        uncached = bench(cold, query, number)
+        cached = bench(fast_parse, query, number)
+        print(f'{name:<12}{legacy:>10.1f}us{uncached:>10.1f}us'
+              f'{cached:>10.1f}us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: list response serialization for a 1,000-item page.
+
+Compares the previous path (jsonable_encoder, response_model validation,
+pydantic dump, orjson) with utils.serializer.ModelSerializer + orjson.
+
+Run from the api directory:
+    python benchmarks/serialization.py
+"""
+import os
+import sys
+import timeit
+
+from datetime import datetime
+
+import orjson
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+import models, schemas  # noqa: E402
+from schemas.status import Status  # noqa: E402
+from utils.serializer import ModelSerializer  # noqa: E402
+
+
+def make_items(n=1000):
+    user = models.User(id=1, name='Admin', login='admin',
+                       is_active=True, is_superuser=True)
+    items = [
+        models.Item(
+            id=i, source_id=1, user_id=1, chat_id=100500,
+            job_id=f'job-{i}', url=f'https://www.reuters.com/world/{i}',
+            title=f'Title {i}', title_ru=f'Заголовок {i}',
+            telegraph_url=f'https://telegra.ph/{i}', status=Status.DONE,
+            date=datetime(2024, 1, 1), created_at=datetime(2024, 1, 1, 12),
+        )
+        for i in range(n)
+    ]
+    # Like a joined load: no backref population on user.items
+    for item in items:
+        set_committed_value(item, 'user', user)
+    return items
+
+
+def legacy(items):
+    content = {'data': jsonable_encoder(items), 'total': len(items)}
+    rows = schemas.ItemRows.model_validate(content)
+    return orjson.dumps(rows.model_dump(mode='json', exclude_unset=True))
+
+
+serializer = ModelSerializer(
+    models.Item, schemas.ItemListEntry, exclude_unset=True,
+    relations={'user': ModelSerializer(
+        models.User, schemas.User, exclude_unset=True
+    )}
+)
+
+
+def direct(items):
+    return orjson.dumps({'data': serializer.to_list(items),
+                         'total': len(items)})
+
+
+def main(number=20):
+    items = make_items()
+    assert orjson.loads(legacy(items)) == orjson.loads(direct(items))
+    for name, func in (('jsonable_encoder', legacy), ('serializer', direct)):
+        best = min(timeit.repeat(
+            lambda: func(items), number=number, repeat=5
+        )) / number * 1e3
+        print(f'{name:<18}{best:>8.2f} ms / 1000 items')
+
+
+if __name__ == '__main__':
+    main()
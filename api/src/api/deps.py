@@ -1,8 +1,8 @@
 ﻿import logging
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 from urllib.parse import urlparse
-from fastapi import Request, Depends, HTTPException, status
+from fastapi import Request, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
@@ -13,7 +13,8 @@ from db.session import async_session  # noqa
 
 import crud, models, schemas  # noqa
 
-from utils.query_string import parse  # noqa
+from utils.query_string import fast_parse  # noqa
+from utils.cursor import decode_cursor  # noqa
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f'{settings.API_VERSION_PREFIX}/auth/access-token'
@@ -65,7 +66,7 @@ async def get_current_active_superuser(
 def query_params(
     request: Request
 ) -> Dict:
-    params = parse(str(request.query_params), normalized=True)
+    params = fast_parse(str(request.query_params), normalized=True)
     return params
 
 
@@ -80,12 +81,35 @@ def request_orders(
 ) -> List:
     return params.get('orders', [])
 
+
+def request_cursor(
+    cursor: Optional[str] = Query(
+        None, description='Keyset pagination cursor, empty for first page'
+    )
+) -> Optional[List]:
+    if cursor is None:
+        return None
+    return decode_cursor(cursor)
+
+
+def request_fields(
+    fields: Optional[str] = Query(
+        None, description='Comma-separated columns to return, e.g. id,title'
+    )
+) -> Optional[List[str]]:
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(',') if field.strip()]
+
+def get_url_domain(url: str) -> str:
+    # Source domain of a URL, shared by single and bulk scheduling
+    return urlparse(url).netloc.removeprefix('www.')
+
 def get_domain(
     params: Dict = Depends(query_params)
 ) -> str:
     url = params.get('url')
-    domain = urlparse(url).netloc.lstrip('www.')
-    return domain
+    return get_url_domain(url) if url else ''
 
 async def get_source(
     db: AsyncSession = Depends(get_db), *,
@@ -1,6 +1,6 @@
 ﻿from fastapi import APIRouter
 
-from .endpoints import base, config, auth, users, sources, items, utils, scrapyd, telegraph  # noqa
+from .endpoints import base, config, auth, users, sources, items, utils, scrapyd, telegraph, jobs, traces  # noqa
 
 
 api_router = APIRouter()
@@ -12,5 +12,7 @@ api_router.include_router(auth.router, prefix='/auth', tags=['Auth'])
 api_router.include_router(users.router, prefix='/users', tags=['Users'])
 api_router.include_router(sources.router, prefix='/sources', tags=['Sources'])
 api_router.include_router(items.router, prefix='/items', tags=['Items'])
+api_router.include_router(jobs.router, prefix='/jobs', tags=['Jobs'])
+api_router.include_router(traces.router, prefix='/traces', tags=['Traces'])
 api_router.include_router(scrapyd.router, prefix='/scrapyd', tags=['Scrapyd'])
 api_router.include_router(telegraph.router, prefix='/telegraph', tags=['Telegraph'])
@@ -1,129 +1,86 @@
-import asyncio
-import aiohttp
 import logging
 
-from typing import Any, List  # noqa
+from typing import Any, List, Literal, Optional  # noqa
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status  # noqa
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, HTTPException, Query, status  # noqa
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api import deps
-from core.config import settings
-from services.translate import google_translate
-from services.publish import publish_to_telegraph
-from services.summarize import openai_summarize
+from services.job_queue import enqueue
 
-from db.session import async_session
-
-from utils.html_cleaner import clean_html
+from utils.serializer import ModelSerializer
 
 import crud, models, schemas  # noqa
 
 router = APIRouter()
 
-async def translate_item(item_id: int):
-    # Background task to translate and update an item.
-    logging.info(f"Запущена фоновая задача translate_item для item_id={item_id}")
-    async with async_session() as db:
-        item = await crud.item.get(db=db, id=item_id)
-        if not item:
-            return
-        if not item.title_ru:
-            item.title_ru = await asyncio.to_thread(
-                google_translate, item.title
-            )
-        if not item.html_ru:
-            item.html_ru = await asyncio.to_thread(
-                google_translate, item.html
-            )
-        if not item.text_ru:
-            item.text_ru = clean_html(item.html_ru)
-        if not item.telegraph_url_ru:
-            item.telegraph_url_ru = await asyncio.to_thread(
-                publish_to_telegraph,
-                item.title_ru, item.html_ru, item.url
-            )
-        db.add(item)
-        await db.commit()
-        TELEGRAM_BOT_TOKEN = settings.TELEGRAM_BOT_TOKEN
-        TELEGRAM_API_URL = f'https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage'
-        text = (f'<b>{item.title_ru}</b>\n\n'
-                f'{item.telegraph_url_ru}')
-        payload = {
-            'chat_id': item.chat_id,
-            'text': text,
-            'parse_mode': 'HTML'
-        }
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(TELEGRAM_API_URL, json=payload) as response:
-                    resp_text = await response.text()
-                    if response.status == 200:
-                        logging.info(f"Telegram sendMessage OK: {resp_text}")
-                    else:
-                        logging.warning(f"Telegram sendMessage failed: {response.status} {resp_text}")
-            except Exception as e:
-                logging.error(f"Exception while sending Telegram message: {e}")
-
-async def summarize_item(item_id: int):
-    # Background task to summarize and update an item.
-    logging.info(f"Запущена фоновая задача summarize_item для item_id={item_id}")
-    async with async_session() as db:
-        item = await crud.item.get(db=db, id=item_id)
-        if not item:
-            return
-        source_name = item.source.name
-        title = item.title_ru or item.title
-        text = item.text_ru or item.text
-        if text and not item.summary_ru:
-            item.summary_ru = await openai_summarize(
-                source_name, title, text
-            )
-        db.add(item)
-        await db.commit()
-        TELEGRAM_BOT_TOKEN = settings.TELEGRAM_BOT_TOKEN
-        TELEGRAM_API_URL = f'https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage'
-        text = (f'<b>{item.title_ru or item.title}</b>\n\n'
-                f'{item.summary_ru}')
-        payload = {
-            'chat_id': item.chat_id,
-            'text': text,
-            'parse_mode': 'HTML'
-        }
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(TELEGRAM_API_URL, json=payload) as response:
-                    resp_text = await response.text()
-                    if response.status == 200:
-                        logging.info(f"Telegram sendMessage OK: {resp_text}")
-                    else:
-                        logging.warning(f"Telegram sendMessage failed: {response.status} {resp_text}")
-            except Exception as e:
-                logging.error(f"Exception while sending Telegram message: {e}")
-
-@router.get('/', response_model=schemas.ItemRows)
+item_serializer = ModelSerializer(
+    models.Item, schemas.ItemListEntry, exclude_unset=True,
+    relations={'user': ModelSerializer(
+        models.User, schemas.User, exclude_unset=True
+    )}
+)
+
+@router.get(
+    '/',
+    response_model=schemas.ItemRows,
+    response_model_exclude_unset=True
+)
 async def read_items(
     db: AsyncSession = Depends(deps.get_db),
     filters: List[schemas.Filter] = Depends(deps.request_filters),
     orders: List[schemas.Order] = Depends(deps.request_orders),
+    cursor: Optional[List] = Depends(deps.request_cursor),
+    fields: Optional[List[str]] = Depends(deps.request_fields),
     skip: int = 0,
     limit: int = 100,
+    count: schemas.CountStrategy = 'exact',
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
-    # Retrieve items.
+    # Retrieve items, heavy text columns only when listed in `fields`.
     if crud.user.is_superuser(current_user):
-        items = await crud.item.get_rows(db, skip=skip, limit=limit)
-        count = await crud.item.get_count(db)
-    else:
-        items = await crud.item.get_rows_by_user(
-            db, filters=filters, orders=orders,
-            user_id=current_user.id, skip=skip, limit=limit
+        items, total = await crud.item.get_page(
+            db, filters=filters, orders=orders, cursor=cursor,
+            fields=fields, skip=skip, limit=limit, count=count
         )
-        count = await crud.item.get_count_by_user(
-            db, filters=filters, user_id=current_user.id
+    else:
+        items, total = await crud.item.get_page_by_user(
+            db, filters=filters, orders=orders, cursor=cursor, fields=fields,
+            user_id=current_user.id, skip=skip, limit=limit, count=count
         )
-    return {'data': jsonable_encoder(items), 'total': count}
+    next_cursor = (
+        crud.item.get_next_cursor(items, limit)
+        if cursor is not None else None
+    )
+    return ORJSONResponse({
+        'data': item_serializer.to_list(items), 'total': total,
+        'next_cursor': next_cursor
+    })
+
+@router.get('/search', response_model=schemas.ItemSearchRows)
+async def search_items(
+    db: AsyncSession = Depends(deps.get_db),
+    q: str = Query(..., min_length=1, description='Web search syntax'),
+    lang: Literal['en', 'ru'] = 'en',
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    # Full-text search over text (en) or text_ru (ru), best matches first.
+    user_id = (
+        None if crud.user.is_superuser(current_user) else current_user.id
+    )
+    hits = await crud.item.search(
+        db, q=q, lang=lang, user_id=user_id, skip=skip, limit=limit
+    )
+    return ORJSONResponse({'data': [
+        {
+            'item': item_serializer.to_dict(item),
+            'rank': rank, 'snippet': snippet
+        }
+        for item, rank, snippet in hits
+    ]})
 
 @router.post(
     '/',
@@ -195,6 +152,45 @@ async def delete_item(
     item = await crud.item.delete(db=db, id=id)
     return item
 
+@router.get('/{id}/jobs', response_model=schemas.JobRows)
+async def read_item_jobs(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    # Translate/summarize jobs of an item, newest first.
+    item = await crud.item.get(db=db, id=id)
+    if not item:
+        raise HTTPException(status_code=404, detail='Item not found')
+    if not crud.user.is_superuser(current_user) and \
+            (item.user_id != current_user.id):
+        raise HTTPException(status_code=400, detail='Not enough permissions')
+    jobs = await crud.job.get_by_item(db, item_id=id)
+    return {'data': jobs}
+
+@router.get('/{id}/trace', response_model=schemas.Trace)
+async def read_item_trace(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    # Stage timings of an item from scheduling to the last Telegram post.
+    item = await crud.item.get(db=db, id=id)
+    if not item:
+        raise HTTPException(status_code=404, detail='Item not found')
+    if not crud.user.is_superuser(current_user) and \
+            (item.user_id != current_user.id):
+        raise HTTPException(status_code=400, detail='Not enough permissions')
+    stages = await crud.stage_timing.get_by_item(db, item_id=id)
+    duration = (
+        max(stage.finished_at for stage in stages) -
+        min(stage.started_at for stage in stages)
+    ).total_seconds() if stages else None
+    return {'item_id': item.id, 'trace_id': item.trace_id,
+            'duration': duration, 'data': stages}
+
 @router.get('/{id}/get', response_model=schemas.Item)
 async def get_item(
     *,
@@ -209,8 +205,7 @@ async def get_item(
 async def translate(
     *,
     db: AsyncSession = Depends(deps.get_db),
-    id: int,
-    background_tasks: BackgroundTasks
+    id: int
 ) -> Any:
     # Translate an item.
     logging.info(f"Вызван эндпоинт translate для id={id}")
@@ -219,7 +214,7 @@ async def translate(
         raise HTTPException(
             status_code=404, detail='Item not found'
         )
-    background_tasks.add_task(translate_item, item.id)
+    await enqueue(db, 'translate', item.id)
     return item
 
 @router.get('/{id}/summarize', response_model=schemas.Item)
@@ -227,7 +222,9 @@ async def summarize(
     *,
     db: AsyncSession = Depends(deps.get_db),
     id: int,
-    background_tasks: BackgroundTasks
+    message_id: Optional[int] = Query(
+        None, description='Bot message to stream the summary into'
+    )
 ) -> Any:
     # Summarize an item.
     logging.info(f"Вызван эндпоинт summarize для id={id}")
@@ -236,5 +233,5 @@ async def summarize(
         raise HTTPException(
             status_code=404, detail='Item not found'
         )
-    background_tasks.add_task(summarize_item, item.id)
+    await enqueue(db, 'summarize', item.id, message_id=message_id)
     return item
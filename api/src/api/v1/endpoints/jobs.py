@@ -0,0 +1,30 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api import deps
+
+import crud, models, schemas  # noqa
+
+router = APIRouter()
+
+
+@router.get('/{id}', response_model=schemas.Job)
+async def read_job(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    # Get job status by ID.
+    job = await crud.job.get(db=db, id=id)
+    if not job:
+        raise HTTPException(status_code=404, detail='Job not found')
+    if not crud.user.is_superuser(current_user):
+        item = await crud.item.get(db=db, id=job.item_id)
+        if not item or item.user_id != current_user.id:
+            raise HTTPException(
+                status_code=400, detail='Not enough permissions'
+            )
+    return job
@@ -1,22 +1,26 @@
+import asyncio
 import logging
-import aiohttp
 
-from typing import Any
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, status  # noqa
 from sqlalchemy.ext.asyncio import AsyncSession
-from scrapyd_api import ScrapydAPI
 
 from api import deps
 from core.config import settings
+from services.scrapyd import scrapyd
+from services.job_queue import enqueue
+from services.tasks import notify_item
+from services.tracing import new_trace_id, record_stage, record_stages, trace_stage
 
-import schemas, crud
+import schemas, crud, models  # noqa
 
 # Настройка логгера для этого модуля
 logger = logging.getLogger("scrapyd_api")
 
-SCRAPYD_URL = "http://scrapyd:6800"
-scrapyd = ScrapydAPI(SCRAPYD_URL)
 
 router = APIRouter()
 
@@ -26,9 +30,13 @@ async def schedule_task(
     db: AsyncSession = Depends(deps.get_db),
     chat_id: int = None,
     url: str,
+    sent_at: float = None,
     domain: str = Depends(deps.get_domain),
     source: schemas.source = Depends(deps.get_source)
 ) -> Any:
+    # The trace starts at the bot message when the bot passes its time
+    started_at = datetime.utcfromtimestamp(sent_at) if sent_at \
+        else datetime.utcnow()
     logger.info(f"Получен запрос на парсинг: url={url}, chat_id={chat_id}, domain={domain}")
     logger.info(f"Объект source: {source}")
 
@@ -50,23 +58,31 @@ async def schedule_task(
         return {'job_id': item.job_id}
 
     logger.info(f"Создаю новую запись item для url={url}, source_id={source.id}")
-    _ = await crud.item.create(
+    job_id = get_queue_job_id()
+    trace_id = new_trace_id()
+    item = await crud.item.create(
         db=db, obj_in={
             'chat_id': chat_id,
             'source_id': source.id,
             'url': url,
+            'job_id': job_id,
+            'trace_id': trace_id,
             'status': schemas.Status.NEW
         }
     )
+    if job_id:
+        logger.info(f"Статья в очереди краулера: job_id={job_id}")
+        await record_stage(item.id, 'schedule', started_at, trace_id=trace_id)
+        return {'job_id': job_id}
 
     logger.info(f"Пробую запустить паука: project='default', spider_name='{source.spider_name}', url='{url}'")
     try:
-        result = scrapyd.schedule(
-            'default', source.spider_name, url=url
-        )
+        result = await scrapyd.schedule(source.spider_name, url=url)
         logger.info(f"Результат scrapyd.schedule: {result}")
     except Exception as e:
         logger.error(f"Ошибка при вызове scrapyd.schedule: {e}")
+        await record_stage(item.id, 'schedule', started_at,
+                           trace_id=trace_id, error=str(e))
         raise HTTPException(
             status_code=500,
             detail=f"Ошибка scrapyd: {e}"
@@ -76,14 +92,130 @@ async def schedule_task(
     if status_ == 'ok':
         jobid = result.get('jobid')
         logger.info(f"Задача успешно запущена: jobid={jobid}")
+        await record_stage(item.id, 'schedule', started_at, trace_id=trace_id)
         return {'job_id': jobid}
 
     logger.error(f"Ошибка запуска паука: {result}")
+    await record_stage(item.id, 'schedule', started_at,
+                       trace_id=trace_id, error=str(result))
     raise HTTPException(
         status_code=422,
         detail=f"Scrapy spider with name '{source.spider_name}' not found"
     )
 
+def get_queue_job_id() -> Optional[str]:
+    # The crawl worker picks NEW items up itself, the id is ours to make
+    return uuid4().hex if settings.CRAWL_MODE == 'worker' else None
+
+
+async def schedule_spider(spider_name: str, urls: List[str]) -> Dict:
+    # One scrapyd job crawls all URLs of a spider
+    try:
+        return await scrapyd.schedule(spider_name, urls='\n'.join(urls))
+    except Exception as e:
+        logger.error(f"Ошибка при вызове scrapyd.schedule: {e}")
+        return {'status': 'error', 'message': str(e)}
+
+
+@router.post("/schedule/bulk/", response_model=schemas.ScrapydBulkRows)
+async def schedule_bulk(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    request: schemas.ScrapydBulkRequest
+) -> Any:
+    # Schedule many URLs: one query per lookup, one scrapyd job per spider
+    # (or straight to the crawl worker queue with CRAWL_MODE=worker).
+    started_at = datetime.utcnow()
+    urls = list(dict.fromkeys(url.strip() for url in request.urls))
+    logger.info(f"Получен запрос на массовый парсинг: {len(urls)} url")
+
+    domains = {url: deps.get_url_domain(url) for url in urls}
+    sources = await crud.source.get_by_domains(db, domains=domains.values())
+    existing = await crud.item.get_ids_by_urls(db, urls=urls)
+
+    results = {}
+    new = []
+    for url in urls:
+        source = sources.get(domains[url])
+        if url in existing:
+            item_id, job_id = existing[url]
+            results[url] = schemas.ScrapydBulkResult(
+                url=url, status='exists', item_id=item_id, job_id=job_id
+            )
+        elif not source:
+            results[url] = schemas.ScrapydBulkResult(
+                url=url, status='unsupported',
+                detail=f'Домен {domains[url]} не поддерживается'
+            )
+        else:
+            new.append(url)
+
+    job_ids = {url: get_queue_job_id() for url in new}
+    trace_ids = {url: new_trace_id() for url in new}
+    ids = await crud.item.create_many(db, objs_in=[{
+        'chat_id': request.chat_id,
+        'source_id': sources[domains[url]].id,
+        'url': url,
+        'job_id': job_ids[url],
+        'trace_id': trace_ids[url],
+        'status': schemas.Status.NEW
+    } for url in new])
+
+    by_spider = defaultdict(list)
+    for url in new:
+        if url not in ids:
+            # Inserted by a concurrent request in the meantime
+            results[url] = schemas.ScrapydBulkResult(url=url, status='exists')
+        elif job_ids[url]:
+            results[url] = schemas.ScrapydBulkResult(
+                url=url, status='scheduled', item_id=ids[url],
+                job_id=job_ids[url]
+            )
+        else:
+            by_spider[sources[domains[url]].spider_name].append(url)
+
+    spiders = list(by_spider)
+    responses = await asyncio.gather(*(
+        schedule_spider(spider, by_spider[spider]) for spider in spiders
+    ))
+    for spider, result in zip(spiders, responses):
+        spider_urls = by_spider[spider]
+        if result.get('status') == 'ok':
+            job_id = result.get('jobid')
+            logger.info(f"Задача {job_id}: {spider}, {len(spider_urls)} url")
+            await crud.item.set_job_id(
+                db, ids=[ids[url] for url in spider_urls], job_id=job_id
+            )
+            for url in spider_urls:
+                results[url] = schemas.ScrapydBulkResult(
+                    url=url, status='scheduled', item_id=ids[url],
+                    job_id=job_id
+                )
+        else:
+            logger.error(f"Ошибка запуска паука {spider}: {result}")
+            for url in spider_urls:
+                results[url] = schemas.ScrapydBulkResult(
+                    url=url, status='failed', item_id=ids[url],
+                    detail=str(result.get('message') or result)
+                )
+
+    finished_at = datetime.utcnow()
+    await record_stages([schemas.StageTimingCreate(
+        item_id=ids[url], trace_id=trace_ids[url], stage='schedule',
+        started_at=started_at, finished_at=finished_at,
+        error=results[url].detail if results[url].status == 'failed' else None
+    ) for url in new if url in ids])
+    return {'data': [results[url] for url in urls]}
+
+
+@router.get("/nodes/")
+async def get_nodes(
+    _: models.User = Depends(deps.get_current_active_superuser)
+) -> Any:
+    # daemonstatus of every configured scrapyd node.
+    return {'data': await scrapyd.nodes_status()}
+
+
 @router.get("/status/{job_id}")
 async def get_status(
     *,
@@ -108,36 +240,15 @@ async def webhook(
     if not item:
         logger.warning(f"Item с id={item_id} не найден")
         raise HTTPException(status_code=404, detail="Item not found")
-    TELEGRAM_BOT_TOKEN = settings.TELEGRAM_BOT_TOKEN
-    TELEGRAM_API_URL = f'https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage'
-    text = (f'<b>{item.title}</b>\n\n'
-            f'<a href="{item.telegraph_url}">'
-            f'{item.telegraph_url}'
-            '</a>')
-    keyboard = {
-        'inline_keyboard': [
-            [
-                {'text': '🇷🇺 Перевод статьи', 'callback_data': f'get_translate:{item.id}'},
-                {'text': '📝️ Саммари статьи', 'callback_data': f'get_summary:{item.id}'}
-            ]
-        ]
-    }
-    payload = {
-        'chat_id': item.chat_id,
-        'text': text,
-        'parse_mode': 'HTML',
-        'reply_markup': keyboard
-    }
-    logger.info(f"Отправляю сообщение в Telegram для chat_id={item.chat_id}")
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-                TELEGRAM_API_URL,
-                json=payload
-        ) as response:
-            resp_text = await response.text()
-            if response.status == 200:
-                logger.info(f"Telegram sendMessage OK: {resp_text}")
-            else:
-                logger.warning(f"Telegram sendMessage failed: {response.status} {resp_text}")
-
+    if item.chat_id is None:
+        # Crawled without being scheduled from a chat, nobody to notify
+        logger.warning(f"У item_id={item_id} нет chat_id, уведомление пропущено")
+        return item
+    if not item.telegraph_url:
+        # The crawler could not publish it, retried by the publish job
+        logger.info(f"Item {item_id} без Telegraph, ставлю задачу publish")
+        await enqueue(db, 'publish', item.id)
+        return item
+    async with trace_stage(item.id, 'notify', trace_id=item.trace_id):
+        await notify_item(db, item)
     return item
@@ -1,7 +1,7 @@
-from typing import Any, List  # noqa
+from typing import Any, List, Optional  # noqa
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status  # noqa
-from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api import deps
@@ -12,30 +12,42 @@ from services.summarize import openai_summarize
 from db.session import async_session
 
 from utils.html_cleaner import clean_html
+from utils.serializer import ModelSerializer
 
 import crud, models, schemas  # noqa
 
 
 router = APIRouter()
 
+source_serializer = ModelSerializer(models.Source, schemas.Source)
+
 
 @router.get('/', response_model=schemas.SourceRows)
 async def read_sources(
     db: AsyncSession = Depends(deps.get_db),
     filters: List[schemas.Filter] = Depends(deps.request_filters),
     orders: List[schemas.Order] = Depends(deps.request_orders),
+    cursor: Optional[List] = Depends(deps.request_cursor),
     skip: int = 0,
     limit: int = 100,
+    count: schemas.CountStrategy = 'exact',
     _: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve sources.
     """
-    sources = await crud.source.get_rows_by_user(
-        db, filters=filters, orders=orders, skip=skip, limit=limit
+    sources, total = await crud.source.get_page(
+        db, filters=filters, orders=orders, cursor=cursor,
+        skip=skip, limit=limit, count=count
+    )
+    next_cursor = (
+        crud.source.get_next_cursor(sources, limit)
+        if cursor is not None else None
     )
-    count = await crud.source.get_count_by_user(db, filters=filters)
-    return {'data': jsonable_encoder(sources), 'total': count}
+    return ORJSONResponse({
+        'data': source_serializer.to_list(sources), 'total': total,
+        'next_cursor': next_cursor
+    })
 
 
 @router.post(
@@ -1,8 +1,8 @@
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException
-from telegraph import Telegraph
 
 from api import deps
+from services.publish import telegraph
 
 import models
 
@@ -19,6 +19,5 @@ async def read_config(
     """
     Create new Telegraph.
     """
-    telegraph = Telegraph()
-    token = telegraph.create_account(short_name=short_name)
-    return token
+    account = await telegraph.create_account(short_name=short_name)
+    return account
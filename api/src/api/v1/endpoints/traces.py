@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api import deps
+
+import crud, models, schemas  # noqa
+
+router = APIRouter()
+
+
+@router.get('/stats', response_model=schemas.StageStatsRows)
+async def read_stage_stats(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    hours: int = Query(24, ge=1, le=24 * 90),
+    source_id: int = None,
+    _: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    # p50/p95 duration of every pipeline stage, overall and per source.
+    since = datetime.utcnow() - timedelta(hours=hours)
+    rows = await crud.stage_timing.get_stats(
+        db, since=since, source_id=source_id
+    )
+    return {'data': [
+        {'stage': stage, 'source': source, 'count': count,
+         'p50': p50, 'p95': p95}
+        for stage, source, count, p50, p95 in rows
+    ]}
@@ -1,38 +1,52 @@
-﻿from typing import List, Any, Annotated
+﻿from typing import List, Any, Annotated, Optional
 
 from fastapi import APIRouter, Body, Depends, Query, HTTPException, status  # noqa
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api import deps  # noqa
 from core.config import settings  # noqa
+from utils.serializer import ModelSerializer  # noqa
 
 import crud, models, schemas  # noqa
 
 
 router = APIRouter()
 
+user_serializer = ModelSerializer(models.User, schemas.User)
+
 
 @router.get('/', response_model=schemas.UserRows)
 async def read_users(
     db: AsyncSession = Depends(deps.get_db),
     filters: List[schemas.Filter] = Depends(deps.request_filters),
     orders: List[schemas.Order] = Depends(deps.request_orders),
+    cursor: Optional[List] = Depends(deps.request_cursor),
     skip: Annotated[
         int, Query(description='Pagination page offset', ge=0)] = 0,
     limit: Annotated[
         int, Query(description='Pagination page size', ge=1)] = 100,
+    count: Annotated[
+        schemas.CountStrategy,
+        Query(description='How to compute the total')] = 'exact',
     current_user: models.User = Depends(deps.get_current_active_superuser)
 ) -> Any:
     """
     Retrieve users.
     """
-    users = await crud.user.get_rows(
-        db, filters=filters, orders=orders,
-        skip=skip, limit=limit
+    users, total = await crud.user.get_page(
+        db, filters=filters, orders=orders, cursor=cursor,
+        skip=skip, limit=limit, count=count
+    )
+    next_cursor = (
+        crud.user.get_next_cursor(users, limit)
+        if cursor is not None else None
     )
-    count = await crud.user.get_count(db, filters=filters)
-    return {'data': jsonable_encoder(users), 'total': count}
+    return ORJSONResponse({
+        'data': user_serializer.to_list(users), 'total': total,
+        'next_cursor': next_cursor
+    })
 
 
 @router.post(
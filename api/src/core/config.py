@@ -1,6 +1,6 @@
 ﻿import secrets
 
-from typing import Any, Union, Optional, List, Dict  # noqa
+from typing import Any, Union, Optional, List, Dict, Literal  # noqa
 from pydantic import Field, PostgresDsn, ValidationInfo, field_validator  # noqa
 from pydantic_settings import BaseSettings
 
@@ -65,6 +65,9 @@ class Settings(BaseSettings):
     DATABASE_POOL_SIZE: int = Field(20, env='DATABASE_POOL_SIZE')
     DATABASE_MAX_OVERFLOW: int = Field(40, env='DATABASE_MAX_OVERFLOW')
 
+    COUNT_CACHE_TTL: int = Field(60, env='COUNT_CACHE_TTL')
+    COUNT_CACHE_SIZE: int = Field(1024, env='COUNT_CACHE_SIZE')
+
     LOG_PATH: Union[str, None] = Field(None, env='LOG_PATH')
     LOG_FORMAT: str = Field(
         '%(asctime)s.%(msecs)03d [%(levelname)s] %(name)s - %(message)s',
@@ -81,16 +84,84 @@ class Settings(BaseSettings):
         'admin', env='FIRST_SUPERUSER_PASSWORD'
     )
 
+    # scrapyd: a scrapyd job per request, worker: queued for the
+    # long-lived crawl worker (scrapy/newshub/worker.py)
+    CRAWL_MODE: Literal['scrapyd', 'worker'] = Field(
+        'scrapyd', env='CRAWL_MODE'
+    )
+    # Comma separated scrapyd nodes, jobs go to the least loaded one
+    SCRAPYD_URLS: str = Field('http://scrapyd:6800', env='SCRAPYD_URLS')
+    SCRAPYD_PROJECT: str = Field('default', env='SCRAPYD_PROJECT')
+    SCRAPYD_STATUS_TTL: float = Field(2.0, env='SCRAPYD_STATUS_TTL')
+    SCRAPYD_NODE_COOLDOWN: float = Field(30.0, env='SCRAPYD_NODE_COOLDOWN')
+
     TELEGRAM_BOT_TOKEN: Union[str, None] = Field(None, env='TELEGRAM_BOT_TOKEN')
     TELEGRAM_BOT_PASSWORD: Union[str, None] = Field(None, env='TELEGRAM_BOT_PASSWORD')
     TELEGRAPH_TOKEN: Union[str, None] = Field(None, env='TELEGRAPH_TOKEN')
+    # Bot API limits: ~30 messages/s overall, 1/s per chat, 20/min per group
+    TELEGRAM_GLOBAL_RATE: float = Field(30.0, env='TELEGRAM_GLOBAL_RATE')
+    TELEGRAM_CHAT_RATE: float = Field(1.0, env='TELEGRAM_CHAT_RATE')
+    TELEGRAM_GROUP_RATE: float = Field(20 / 60, env='TELEGRAM_GROUP_RATE')
+    TELEGRAM_EDIT_INTERVAL: float = Field(1.5, env='TELEGRAM_EDIT_INTERVAL')
+    TELEGRAM_POLL_INTERVAL: float = Field(0.5, env='TELEGRAM_POLL_INTERVAL')
+    TELEGRAM_BATCH_SIZE: int = Field(100, env='TELEGRAM_BATCH_SIZE')
+    TELEGRAM_MAX_ATTEMPTS: int = Field(8, env='TELEGRAM_MAX_ATTEMPTS')
+    TELEGRAM_RETRY_BACKOFF: int = Field(5, env='TELEGRAM_RETRY_BACKOFF')
+    TELEGRAM_LOCK_TIMEOUT: int = Field(120, env='TELEGRAM_LOCK_TIMEOUT')
+    TELEGRAPH_MAX_RETRIES: int = Field(3, env='TELEGRAPH_MAX_RETRIES')
+    TELEGRAPH_MAX_FLOOD_WAIT: int = Field(60, env='TELEGRAPH_MAX_FLOOD_WAIT')
     SPIDER_PROXY_URL: Union[str, None] = Field(None, env='SPIDER_PROXY_URL')
     TRANSLATE_PROXY_URL: Union[str, None] = Field(None, env='TRANSLATE_PROXY_URL')
+    TRANSLATE_MAX_CHARS: int = Field(5000, env='TRANSLATE_MAX_CHARS')
+    TRANSLATE_CONCURRENCY: int = Field(4, env='TRANSLATE_CONCURRENCY')
+    # Processes parsing HTML off the event loop, 0 uses threads instead
+    HTML_PROCESSES: int = Field(2, env='HTML_PROCESSES')
+    TRANSLATION_MEMORY_SIZE: int = Field(
+        10000, env='TRANSLATION_MEMORY_SIZE'
+    )
+    HTTP_POOL_SIZE: int = Field(100, env='HTTP_POOL_SIZE')
+    HTTP_POOL_SIZE_PER_HOST: int = Field(20, env='HTTP_POOL_SIZE_PER_HOST')
+    HTTP_KEEPALIVE_TIMEOUT: float = Field(30.0, env='HTTP_KEEPALIVE_TIMEOUT')
+    HTTP_TIMEOUT: float = Field(30.0, env='HTTP_TIMEOUT')
+    JOB_POLL_INTERVAL: float = Field(1.0, env='JOB_POLL_INTERVAL')
+    JOB_LOCK_TIMEOUT: int = Field(600, env='JOB_LOCK_TIMEOUT')
+    JOB_MAX_ATTEMPTS: int = Field(5, env='JOB_MAX_ATTEMPTS')
+    JOB_RETRY_BACKOFF: int = Field(10, env='JOB_RETRY_BACKOFF')
+    JOB_CONCURRENCY_TRANSLATE: int = Field(
+        2, env='JOB_CONCURRENCY_TRANSLATE'
+    )
+    JOB_CONCURRENCY_SUMMARIZE: int = Field(
+        2, env='JOB_CONCURRENCY_SUMMARIZE'
+    )
+    JOB_CONCURRENCY_PUBLISH: int = Field(
+        2, env='JOB_CONCURRENCY_PUBLISH'
+    )
+    SUMMARY_CACHE_SIZE: int = Field(1000, env='SUMMARY_CACHE_SIZE')
+    # Prometheus exporter of the job worker process, None disables it
+    METRICS_WORKER_PORT: Union[int, None] = Field(
+        9100, env='METRICS_WORKER_PORT'
+    )
+    # How often event loop lag is sampled, seconds
+    METRICS_LOOP_LAG_INTERVAL: float = Field(
+        0.5, env='METRICS_LOOP_LAG_INTERVAL'
+    )
     OPENAI_PROXY_URL: Union[str, None] = Field(None, env='OPENAI_PROXY_URL')
     OPENAI_API_KEY: Union[str, None] = Field(None, env='OPENAI_API_KEY')
     OPENAI_MODEL: Union[str, None] = Field(None, env='OPENAI_MODEL')
     OPENAI_MAX_TOKENS: Union[int, None] = Field(None, env='OPENAI_MAX_TOKENS')
     OPENAI_TEMPERATURE: Union[float, None] = Field(None, env='OPENAI_TEMPERATURE')
+    # auto: map-reduce only above OPENAI_INPUT_TOKENS, single: never,
+    # map_reduce: whenever the text exceeds one section
+    OPENAI_SUMMARIZE_MODE: Literal['auto', 'single', 'map_reduce'] = Field(
+        'auto', env='OPENAI_SUMMARIZE_MODE'
+    )
+    OPENAI_STREAM: bool = Field(True, env='OPENAI_STREAM')
+    OPENAI_INPUT_TOKENS: int = Field(12000, env='OPENAI_INPUT_TOKENS')
+    OPENAI_CHUNK_TOKENS: int = Field(3000, env='OPENAI_CHUNK_TOKENS')
+    OPENAI_SECTION_MAX_TOKENS: int = Field(
+        600, env='OPENAI_SECTION_MAX_TOKENS'
+    )
+    OPENAI_MAP_CONCURRENCY: int = Field(4, env='OPENAI_MAP_CONCURRENCY')
     OPENAI_CONTEXT: Union[str, None] = Field(None, env='OPENAI_CONTEXT')
     OPENAI_PROMPT: Union[str, None] = Field(None, env='OPENAI_PROMPT')
 
@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+)  # noqa
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+# Slow external calls (OpenAI, translation of long texts) need a long tail
+LATENCY_BUCKETS = (
+    .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120
+)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'API request latency',
+    ['method', 'route', 'status']
+)
+EXTERNAL_LATENCY = Histogram(
+    'external_request_duration_seconds', 'Latency of external service calls',
+    ['service', 'method'], buckets=LATENCY_BUCKETS
+)
+EXTERNAL_ERRORS = Counter(
+    'external_request_errors_total', 'Failed external service calls',
+    ['service', 'method', 'error']
+)
+DB_POOL_CHECKOUT = Histogram(
+    'db_pool_checkout_duration_seconds',
+    'Time to get a connection from the SQLAlchemy pool'
+)
+DB_POOL_TIMEOUTS = Counter(
+    'db_pool_timeouts_total', 'Pool checkouts that timed out'
+)
+QUEUE_DEPTH = Gauge(
+    'queue_depth', 'Rows waiting or running in the database queues',
+    ['queue', 'status']
+)
+JOBS_IN_FLIGHT = Gauge(
+    'jobs_in_flight', 'Jobs running in this worker', ['kind']
+)
+JOBS = Counter(
+    'jobs_total', 'Finished job attempts', ['kind', 'result']
+)
+TRANSLATION_MEMORY = Counter(
+    'translation_memory_segments_total',
+    'Segments looked up in the translation memory',
+    ['result']  # memory_hit, db_hit, miss
+)
+TRANSLATION_MEMORY_CACHED = Gauge(
+    'translation_memory_cached', 'Segments in the in-process LRU'
+)
+EVENT_LOOP_LAG = Histogram(
+    'event_loop_lag_seconds', 'How late the event loop runs a due callback',
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+)
+
+
+@contextmanager
+def track_call(service: str, method: str = ''):
+    """
+    Times a call to an external service, exceptions count as errors
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        EXTERNAL_ERRORS.labels(service, method, type(e).__name__).inc()
+        raise
+    finally:
+        EXTERNAL_LATENCY.labels(service, method).observe(
+            time.perf_counter() - start
+        )
+
+
+def count_error(service: str, method: str, error) -> None:
+    # Failures reported in a response body rather than raised
+    EXTERNAL_ERRORS.labels(service, method, str(error)).inc()
+
+
+class TimedPool(AsyncAdaptedQueuePool):
+    # Queue pool that records how long checkouts wait for a connection
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT.observe(time.perf_counter() - start)
+
+
+class PoolCollector:
+    # Connection counts of an engine pool, read at scrape time
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    def collect(self):
+        pool = self.engine.sync_engine.pool
+        family = GaugeMetricFamily(
+            'db_pool_connections', 'SQLAlchemy pool connections by state',
+            labels=['state']
+        )
+        family.add_metric(['size'], pool.size())
+        family.add_metric(['checked_in'], pool.checkedin())
+        family.add_metric(['checked_out'], pool.checkedout())
+        family.add_metric(['overflow'], max(pool.overflow(), 0))
+        yield family
+
+
+async def monitor_event_loop(interval: float) -> None:
+    # Sleeps for interval and records how much later the loop woke up
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(loop.time() - start - interval, 0))
+
+
+def register_engine(engine: AsyncEngine) -> None:
+    REGISTRY.register(PoolCollector(engine))
+
+
+def get_metrics() -> bytes:
+    return generate_latest(REGISTRY)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template, so
+    /items/1 and /items/2 share one series. Unmatched paths are grouped.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = getattr(scope.get('route'), 'path', None) or 'unmatched'
+            REQUEST_LATENCY.labels(scope['method'], route, status).observe(
+                time.perf_counter() - start
+            )
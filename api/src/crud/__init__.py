@@ -1,4 +1,9 @@
 ﻿from .config import config  # noqa
 from .user import user  # noqa
 from .source import source  # noqa
-from .item import item  # noqa
\ No newline at end of file
+from .item import item  # noqa
+from .translation import translation  # noqa
+from .job import job  # noqa
+from .telegram_message import telegram_message  # noqa
+from .summary import summary  # noqa
+from .stage_timing import stage_timing  # noqa
\ No newline at end of file
@@ -1,89 +1,62 @@
-﻿from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union  # noqa
+﻿import asyncio
+
+from datetime import datetime
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union  # noqa
+
+import orjson
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 
-from sqlalchemy import select, func, or_  # noqa
+from sqlalchemy import select, func, tuple_, text, DateTime  # noqa
+from sqlalchemy.orm import defer, load_only
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.config import settings  # noqa
+from crud.filters import compile_filters  # noqa
 from db.base_class import Base  # noqa
+from db.explain import Explain, plan_rows  # noqa
+from db.session import async_session  # noqa
+from utils.cache import TTLCache  # noqa
+from utils.cursor import encode_cursor, InvalidCursorError  # noqa
 
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Totals per (table, normalized filters), shared by all CRUD instances
+count_cache = TTLCache(
+    maxsize=settings.COUNT_CACHE_SIZE, ttl=settings.COUNT_CACHE_TTL
+)
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Large columns left out of list queries unless asked for by `fields`
+    heavy_columns: Tuple[str, ...] = ()
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
+        self.column_names = set(model.__table__.columns.keys())
+        # Keyset pagination resumes after the last seen (created_at, id)
+        self.cursor_columns = [
+            getattr(model, name) for name in ('created_at', 'id')
+            if hasattr(model, name)
+        ]
+        self.count_strategies = {
+            'exact': self.get_exact_count,
+            'estimate': self.get_estimated_count,
+            'cached': self.get_cached_count,
+        }
 
-    def get_filters(self, filters: list = None) -> List[Dict]:  # noqa
-        filter_list = []
-        for i in range(len(filters)):
-            if filters[i].get('filters', None):
-                if filters[i].get('logic', None) == 'or':
-                    filter_list.append(
-                        or_(*self.get_filters(filters[i]['filters']))
-                    )
-                else:
-                    filter_list.append(
-                        *self.get_filters(filters[i]['filters'])
-                    )
-                continue
-            if filters[i].get('or', None):
-                filter_list.append(or_(*self.get_filters(filters[i]['or'])))
-                continue
-            field = (
-                getattr(self.model, filters[i]['field'], None)
-                if isinstance(filters[i]['field'], str)
-                else filters[i]['field']
-            )
-            if filters[i]['operator'] == 'eq':
-                where = field == filters[i]['value']
-            if filters[i]['operator'] == 'neq':
-                where = field != filters[i]['value']
-            if filters[i]['operator'] == 'gt':
-                where = field > filters[i]['value']
-            if filters[i]['operator'] == 'gte':
-                where = field >= filters[i]['value']
-            if filters[i]['operator'] == 'lt':
-                where = field < filters[i]['value']
-            if filters[i]['operator'] == 'lte':
-                where = field <= filters[i]['value']
-            if filters[i]['operator'] == 'startswith':
-                where = field.like(f"{filters[i]['value']}%")
-            if filters[i]['operator'] == 'endswith':
-                where = field.like(f"%{filters[i]['value']}")
-            if filters[i]['operator'] == 'contains':
-                where = field.like(f"%{filters[i]['value']}%")
-            if filters[i]['operator'] == 'doesnotcontain':
-                where = field.notlike(f"%{filters[i]['value']}%")
-            if filters[i]['operator'] == 'isnull':
-                where = field.is_(None)
-            if filters[i]['operator'] == 'isnotnull':
-                where = field.is_not(None)
-            if filters[i]['operator'] == '?':
-                where = field.op('?')(filters[i]['value'])
-            if filters[i]['operator'] == 'in':
-                if None in filters[i]['value']:
-                    values = [v for v in filters[i]['value'] if v]
-                    where = or_(
-                        field.is_(None),
-                        field.in_(values)
-                    )
-                else:
-                    where = field.in_(filters[i]['value'])
-            if filters[i]['operator'] == 'or':
-                where = [or_(field) == value for value in filters[i]['value']]
-
-            if relationship := filters[i].get('relationship'):
-                filter_list.append(relationship.has(where))
-            else:
-                filter_list.append(where)
-
-        return filter_list
+    def get_filters(
+        self, filters: list = None
+    ) -> Tuple[List, Dict[str, Any]]:
+        if not filters:
+            return [], {}
+        clauses, params = compile_filters(self.model, filters)
+        return list(clauses), params
 
     def get_orders(self, orders: list = None) -> List[Dict]:
         order_list = []
@@ -98,30 +71,157 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                             orders[i]['field']).asc())
         return order_list
 
+    def get_load_options(self, fields: list = None) -> List:
+        if fields:
+            names = {
+                *(name for name in fields if name in self.column_names),
+                *(column.key for column in self.cursor_columns)
+            }
+            return [load_only(
+                *(getattr(self.model, name) for name in names),
+                raiseload=True
+            )]
+        return [
+            defer(getattr(self.model, name), raiseload=True)
+            for name in self.heavy_columns
+        ]
+
+    def get_cursor_filters(self, cursor: list = None) -> List:
+        if not cursor:
+            return []
+        if len(cursor) != len(self.cursor_columns):
+            raise InvalidCursorError
+        values = []
+        for column, value in zip(self.cursor_columns, cursor):
+            if isinstance(column.type, DateTime) and value is not None:
+                try:
+                    value = datetime.fromisoformat(value)
+                except (TypeError, ValueError):
+                    raise InvalidCursorError
+            values.append(value)
+        return [tuple_(*self.cursor_columns) < tuple_(*values)]
+
+    def get_next_cursor(
+        self, rows: List[ModelType], limit: int = None
+    ) -> Optional[str]:
+        if not rows or not limit or len(rows) < limit:
+            return None
+        return encode_cursor([
+            getattr(rows[-1], column.key) for column in self.cursor_columns
+        ])
+
     async def get_rows(
             self, db: AsyncSession, *, skip=0, limit=100,
-            filters: list = None, orders: list = None
+            filters: list = None, orders: list = None, cursor: list = None,
+            fields: list = None
     ) -> List[ModelType]:
-        filter_list = self.get_filters(filters) if filters else []
+        if cursor is not None and orders:
+            # The cursor is a key of the fixed newest-first order
+            raise InvalidCursorError('Cursor can not be combined with orders')
+        filter_list, params = self.get_filters(filters)
         order_list = self.get_orders(orders) if orders else []
+        if cursor is not None:
+            # Keyset mode: fixed newest-first order, no rows to skip
+            filter_list.extend(self.get_cursor_filters(cursor))
+            order_list = [column.desc() for column in self.cursor_columns]
+            skip = 0
         statement = (select(self.model).
+                     options(*self.get_load_options(fields)).
                      where(*filter_list).
                      order_by(*order_list).
                      offset(skip))
         if limit:
             statement = statement.limit(limit)
-        results = await db.execute(statement=statement)
+        results = await db.execute(statement, params)
         return results.unique().scalars().all()
 
     async def get_count(
-        self, db: AsyncSession, *, filters: dict = None
-    ) -> List[ModelType]:
-        filter_list = self.get_filters(filters) if filters else []
+        self, db: AsyncSession, *, filters: list = None,
+        strategy: str = 'exact'
+    ) -> Optional[int]:
+        if strategy == 'none':
+            return None
+        return await self.count_strategies[strategy](db, filters=filters)
+
+    async def get_exact_count(
+        self, db: AsyncSession, *, filters: list = None
+    ) -> int:
+        filter_list, params = self.get_filters(filters)
         statement = (select(func.count(self.model.id)).
                      where(*filter_list))
-        results = await db.execute(statement=statement)
+        results = await db.execute(statement, params)
         return results.scalar_one()
 
+    async def get_estimated_count(
+        self, db: AsyncSession, *, filters: list = None
+    ) -> int:
+        if not filters:
+            # Planner statistics for the whole table, no scan at all
+            statement = text(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = to_regclass(:table)'
+            )
+            results = await db.execute(
+                statement, {'table': self.model.__tablename__}
+            )
+            estimate = results.scalar_one_or_none()
+            if estimate is not None and estimate >= 0:
+                return estimate
+            return await self.get_exact_count(db)
+        filter_list, params = self.get_filters(filters)
+        statement = select(self.model.id).where(*filter_list)
+        results = await db.execute(Explain(statement), params)
+        return plan_rows(results.scalar_one())
+
+    def get_count_key(self, filters: list = None) -> tuple:
+        return (
+            self.model.__tablename__,
+            orjson.dumps(filters or [], default=str,
+                         option=orjson.OPT_SORT_KEYS)
+        )
+
+    async def get_cached_count(
+        self, db: AsyncSession, *, filters: list = None
+    ) -> int:
+        key = self.get_count_key(filters)
+        count = count_cache.get(key)
+        if count is None:
+            count = await self.get_exact_count(db, filters=filters)
+            count_cache.set(key, count)
+        return count
+
+    async def get_page(
+        self, db: AsyncSession, *, skip=0, limit=100,
+        filters: list = None, orders: list = None, cursor: list = None,
+        fields: list = None, count: str = 'exact'
+    ) -> Tuple[List[ModelType], Optional[int]]:
+        if cursor is not None and orders:
+            raise InvalidCursorError('Cursor can not be combined with orders')
+        get_rows = self.get_rows(
+            db, skip=skip, limit=limit, filters=filters,
+            orders=orders, cursor=cursor, fields=fields
+        )
+        if count == 'cached':
+            total = count_cache.get(self.get_count_key(filters))
+            if total is not None:
+                return await get_rows, total
+        if count not in ('exact', 'cached'):
+            # Estimates and 'none' are cheap, not worth a second connection
+            rows = await get_rows
+            return rows, await self.get_count(
+                db, filters=filters, strategy=count
+            )
+
+        # A session runs one statement at a time, so the exact total is
+        # taken on its own connection to overlap with the rows query
+        async def get_total():
+            async with async_session() as count_db:
+                return await self.get_count(
+                    count_db, filters=filters, strategy=count
+                )
+
+        return tuple(await asyncio.gather(get_rows, get_total()))
+
     async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
         statement = select(self.model).where(self.model.id == id)
         result = await db.execute(statement=statement)
@@ -0,0 +1,168 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import and_, bindparam, or_
+
+
+# Operators without a right-hand side
+NO_VALUE = object()
+
+
+# eq/neq against None compile to IS NULL / IS NOT NULL, a bound NULL
+# would never match
+NULL_OPERATORS = {
+    'eq': lambda field: field.is_(None),
+    'neq': lambda field: field.is_not(None),
+}
+
+
+# Escape character for LIKE patterns, so user input can't add wildcards
+LIKE_ESCAPE = '/'
+
+
+def _like(pattern):
+    def transform(value):
+        value = str(value)
+        for char in (LIKE_ESCAPE, '%', '_'):
+            value = value.replace(char, LIKE_ESCAPE + char)
+        return pattern.format(value)
+    return transform
+
+
+def _build_like(method):
+    return lambda field, param: getattr(field, method)(
+        param, escape=LIKE_ESCAPE
+    )
+
+
+def _in_values(value):
+    values = value if isinstance(value, (list, tuple)) else [value]
+    return [v for v in values if v is not None]
+
+
+def _build_in(field, param, has_null):
+    if has_null:
+        return or_(field.is_(None), field.in_(param))
+    return field.in_(param)
+
+
+# operator -> (expression builder, value transform)
+OPERATORS = {
+    'eq': (lambda field, param: field == param, None),
+    'neq': (lambda field, param: field != param, None),
+    'gt': (lambda field, param: field > param, None),
+    'gte': (lambda field, param: field >= param, None),
+    'lt': (lambda field, param: field < param, None),
+    'lte': (lambda field, param: field <= param, None),
+    # pg_trgm GIN indexes serve both LIKE and ILIKE with leading wildcards
+    'startswith': (_build_like('like'), _like('{}%')),
+    'endswith': (_build_like('like'), _like('%{}')),
+    'contains': (_build_like('like'), _like('%{}%')),
+    'doesnotcontain': (_build_like('notlike'), _like('%{}%')),
+    'istartswith': (_build_like('ilike'), _like('{}%')),
+    'iendswith': (_build_like('ilike'), _like('%{}')),
+    'icontains': (_build_like('ilike'), _like('%{}%')),
+    'idoesnotcontain': (_build_like('notilike'), _like('%{}%')),
+    'isnull': (lambda field, param: field.is_(None), NO_VALUE),
+    'isnotnull': (lambda field, param: field.is_not(None), NO_VALUE),
+    '?': (lambda field, param: field.op('?')(param), None),
+    'in': (_build_in, _in_values),
+    'or': (
+        lambda field, params: or_(*[field == param for param in params]),
+        list
+    ),
+}
+
+
+def _leaf_shape(node: Dict, values: List) -> Tuple:
+    field = node['field']
+    op = node['operator']
+    transform = OPERATORS[op][1]
+    variant = None
+    if transform is NO_VALUE:
+        pass
+    elif op in NULL_OPERATORS and node.get('value') is None:
+        variant = 'null'
+    elif op == 'in':
+        raw = node.get('value')
+        raw = raw if isinstance(raw, (list, tuple)) else [raw]
+        variant = None in raw
+        values.append(transform(raw))
+    elif op == 'or':
+        items = transform(node['value'])
+        variant = len(items)
+        values.extend(items)
+    else:
+        value = node.get('value')
+        values.append(transform(value) if transform else value)
+    return ('leaf', field, op, variant, node.get('relationship'))
+
+
+def get_shape(filters: List[Dict], values: List) -> Tuple:
+    """
+    Strip values off a filter tree, collecting them in traversal order.
+    The result is hashable and identical for every request that differs
+    only in filter values.
+    """
+    shape = []
+    for node in filters:
+        if node.get('filters', None):
+            logic = 'or' if node.get('logic', None) == 'or' else 'and'
+            shape.append(('group', logic, get_shape(node['filters'], values)))
+        elif node.get('or', None):
+            shape.append(('group', 'or', get_shape(node['or'], values)))
+        else:
+            shape.append(_leaf_shape(node, values))
+    return tuple(shape)
+
+
+def _build(model, shape: Tuple, counter: List[int]) -> List:
+    def param(expanding=False):
+        name = f'filter_{counter[0]}'
+        counter[0] += 1
+        return bindparam(name, expanding=expanding)
+
+    clauses = []
+    for node in shape:
+        if node[0] == 'group':
+            _, logic, children = node
+            join = or_ if logic == 'or' else and_
+            clauses.append(join(*_build(model, children, counter)))
+            continue
+        _, field, op, variant, relationship = node
+        if isinstance(field, str):
+            field = getattr(model, field)
+        builder, transform = OPERATORS[op]
+        if transform is NO_VALUE:
+            where = builder(field, None)
+        elif variant == 'null':
+            where = NULL_OPERATORS[op](field)
+        elif op == 'in':
+            where = builder(field, param(expanding=True), variant)
+        elif op == 'or':
+            where = builder(field, [param() for _ in range(variant)])
+        else:
+            where = builder(field, param())
+        clauses.append(relationship.has(where) if relationship else where)
+    return clauses
+
+
+@lru_cache(maxsize=512)
+def get_template(model, shape: Tuple) -> Tuple:
+    """
+    WHERE clauses for a filter shape with bind parameters named
+    filter_0, filter_1... in traversal order. Cached per model and shape,
+    so hot filter sets reuse the same expression objects.
+    """
+    return tuple(_build(model, shape, [0]))
+
+
+def compile_filters(model, filters: List[Dict]) -> Tuple[Tuple, Dict[str, Any]]:
+    """
+    Turn a filter spec into cached WHERE clauses plus the parameters
+    to execute them with
+    """
+    values = []
+    shape = get_shape(filters, values)
+    params = {f'filter_{i}': value for i, value in enumerate(values)}
+    return get_template(model, shape), params
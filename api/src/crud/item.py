@@ -1,7 +1,10 @@
-from typing import List, Optional
+import html
+
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import select, func
+from sqlalchemy import select, func, literal_column, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from crud.base import CRUDBase  # noqa
@@ -9,7 +12,35 @@ from models.item import Item  # noqa
 from schemas.item import ItemCreate, ItemUpdate  # noqa
 
 
+# language -> (text search config, vector column, headline source)
+SEARCH_LANGUAGES = {
+    'en': ('english', Item.search_en, Item.text),
+    'ru': ('russian', Item.search_ru, Item.text_ru),
+}
+
+# Article text is not HTML-safe: the headline marks matches with control
+# characters, the snippet is escaped and they become <b></b> afterwards
+HIGHLIGHT_START, HIGHLIGHT_STOP = '\x02', '\x03'
+HEADLINE_OPTIONS = (
+    'MaxFragments=2, MaxWords=30, MinWords=10, '
+    f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}", '
+    'FragmentDelimiter= … '
+)
+
+
+def highlight_snippet(snippet: Optional[str]) -> Optional[str]:
+    if snippet is None:
+        return None
+    return (html.escape(snippet).
+            replace(HIGHLIGHT_START, '<b>').
+            replace(HIGHLIGHT_STOP, '</b>'))
+
+
 class CRUDItem(CRUDBase[Item, ItemCreate, ItemUpdate]):
+    heavy_columns = (
+        'text', 'text_ru', 'html', 'html_ru', 'summary', 'summary_ru'
+    )
+
     async def create_with_user(
         self, db: AsyncSession, *, obj_in: ItemCreate, user_id: int
     ) -> Item:
@@ -22,22 +53,72 @@ class CRUDItem(CRUDBase[Item, ItemCreate, ItemUpdate]):
 
     async def get_rows_by_user(
         self, db: AsyncSession, *, user_id: int,
-        skip: int = 0, limit: int = 100
+        skip: int = 0, limit: int = 100,
+        filters: list = None, orders: list = None, cursor: list = None,
+        fields: list = None
     ) -> List[Item]:
-        statement = (select(self.model).
-                     where(self.model.user_id == user_id).
-                     offset(skip).
-                     limit(limit))
-        results = await db.execute(statement=statement)
-        return results.scalars().all()
+        filters = [
+            {'field': 'user_id', 'operator': 'eq', 'value': user_id},
+            *(filters or [])
+        ]
+        return await self.get_rows(
+            db, skip=skip, limit=limit,
+            filters=filters, orders=orders, cursor=cursor, fields=fields
+        )
 
     async def get_count_by_user(
-        self, db: AsyncSession, *, user_id: int
+        self, db: AsyncSession, *, user_id: int, filters: list = None
     ) -> int:
-        statement = (select(func.count(self.model.id)).
-                     where(self.model.user_id == user_id))
+        filters = [
+            {'field': 'user_id', 'operator': 'eq', 'value': user_id},
+            *(filters or [])
+        ]
+        return await self.get_count(db, filters=filters)
+
+    async def get_page_by_user(
+        self, db: AsyncSession, *, user_id: int,
+        skip: int = 0, limit: int = 100,
+        filters: list = None, orders: list = None, cursor: list = None,
+        fields: list = None, count: str = 'exact'
+    ) -> Tuple[List[Item], Optional[int]]:
+        filters = [
+            {'field': 'user_id', 'operator': 'eq', 'value': user_id},
+            *(filters or [])
+        ]
+        return await self.get_page(
+            db, skip=skip, limit=limit, filters=filters,
+            orders=orders, cursor=cursor, fields=fields, count=count
+        )
+
+    async def search(
+        self, db: AsyncSession, *, q: str, lang: str = 'en',
+        user_id: int = None, skip: int = 0, limit: int = 20
+    ) -> List[Tuple[Item, float, str]]:
+        config, vector, source = SEARCH_LANGUAGES[lang]
+        config = literal_column(f"'{config}'::regconfig")
+        query = func.websearch_to_tsquery(config, q)
+        rank = func.ts_rank_cd(vector, query)
+        # Rank on the GIN index first, build headlines for the page only
+        ranked = (select(self.model.id, rank.label('rank')).
+                  where(vector.op('@@')(query)))
+        if user_id is not None:
+            ranked = ranked.where(self.model.user_id == user_id)
+        ranked = (ranked.
+                  order_by(rank.desc(), self.model.id.desc()).
+                  offset(skip).
+                  limit(limit).
+                  subquery())
+        snippet = func.ts_headline(config, source, query, HEADLINE_OPTIONS)
+        statement = (select(self.model, ranked.c.rank,
+                            snippet.label('snippet')).
+                     options(*self.get_load_options()).
+                     join(ranked, self.model.id == ranked.c.id).
+                     order_by(ranked.c.rank.desc(), self.model.id.desc()))
         results = await db.execute(statement=statement)
-        return results.scalar_one()
+        return [
+            (item, rank, highlight_snippet(snippet))
+            for item, rank, snippet in results.unique().all()
+        ]
 
     async def get_by_url(
         self, db: AsyncSession, *, url: str
@@ -49,9 +130,43 @@ class CRUDItem(CRUDBase[Item, ItemCreate, ItemUpdate]):
     async def get_by_job_id(
         self, db: AsyncSession, *, job_id: str
     ) -> Optional[Item]:
-        statement = select(Item).where(Item.job_id == job_id)
+        # Bulk scheduled jobs crawl several items, the first one answers
+        statement = (select(Item).
+                     where(Item.job_id == job_id).
+                     order_by(Item.id).
+                     limit(1))
         results = await db.execute(statement=statement)
-        return results.scalar_one_or_none()
+        return results.scalars().first()
+
+    async def get_ids_by_urls(
+        self, db: AsyncSession, *, urls: Iterable[str]
+    ) -> Dict[str, Tuple[int, Optional[str]]]:
+        # url -> (id, job_id) of already known items
+        statement = (select(Item.url, Item.id, Item.job_id).
+                     where(Item.url.in_(set(urls))))
+        results = await db.execute(statement=statement)
+        return {url: (id, job_id) for url, id, job_id in results.all()}
+
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: List[Dict]
+    ) -> Dict[str, int]:
+        # url -> id of the inserted rows, URLs taken concurrently are skipped
+        if not objs_in:
+            return {}
+        statement = (insert(Item).
+                     values(objs_in).
+                     on_conflict_do_nothing(index_elements=['url']).
+                     returning(Item.url, Item.id))
+        results = await db.execute(statement)
+        await db.commit()
+        return dict(results.all())
+
+    async def set_job_id(
+        self, db: AsyncSession, *, ids: List[int], job_id: str
+    ) -> None:
+        statement = update(Item).where(Item.id.in_(ids)).values(job_id=job_id)
+        await db.execute(statement)
+        await db.commit()
 
 
 item = CRUDItem(Item)
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud.base import CRUDBase  # noqa
+from models.job import Job  # noqa
+from schemas.job import JobCreate  # noqa
+from schemas.status import Status
+
+
+# Literal predicate of ix_job_active_key, bound parameters would keep
+# Postgres from matching the partial index as the conflict arbiter
+ACTIVE_PREDICATE = text("status IN ('NEW', 'IN_PROGRESS')")
+
+
+class CRUDJob(CRUDBase[Job, JobCreate, JobCreate]):
+    async def enqueue(self, db: AsyncSession, *, obj_in: JobCreate) -> Job:
+        # Returns the already queued or running job with the same key
+        values = obj_in.model_dump(exclude_none=True)
+        statement = (insert(self.model).
+                     values(**values, status=Status.NEW,
+                            run_at=datetime.utcnow()).
+                     on_conflict_do_nothing(
+                         index_elements=['idempotency_key'],
+                         index_where=ACTIVE_PREDICATE
+                     ))
+        await db.execute(statement)
+        await db.commit()
+        statement = (select(self.model).
+                     where(self.model.idempotency_key == obj_in.idempotency_key).
+                     order_by(self.model.id.desc()).
+                     limit(1))
+        results = await db.execute(statement=statement)
+        return results.scalars().first()
+
+    async def claim(
+        self, db: AsyncSession, *, kind: str, limit: int,
+        lock_timeout: int
+    ) -> List[Job]:
+        # Due jobs plus running ones whose worker died, each row goes
+        # to exactly one worker thanks to SKIP LOCKED
+        if limit <= 0:
+            return []
+        now = datetime.utcnow()
+        statement = (select(self.model.id).
+                     where(self.model.kind == kind).
+                     where(or_(
+                         and_(self.model.status == Status.NEW,
+                              self.model.run_at <= now),
+                         and_(self.model.status == Status.IN_PROGRESS,
+                              self.model.locked_at <
+                              now - timedelta(seconds=lock_timeout)),
+                     )).
+                     order_by(self.model.run_at).
+                     limit(limit).
+                     with_for_update(skip_locked=True))
+        ids = (await db.execute(statement=statement)).scalars().all()
+        if not ids:
+            await db.commit()
+            return []
+        statement = (update(self.model).
+                     where(self.model.id.in_(ids)).
+                     values(status=Status.IN_PROGRESS, locked_at=now,
+                            attempts=self.model.attempts + 1,
+                            updated_at=now).
+                     returning(self.model))
+        jobs = (await db.execute(statement)).scalars().all()
+        await db.commit()
+        return jobs
+
+    async def complete(self, db: AsyncSession, *, id: int) -> None:
+        statement = (update(self.model).
+                     where(self.model.id == id).
+                     values(status=Status.DONE, locked_at=None, error=None,
+                            updated_at=datetime.utcnow()))
+        await db.execute(statement)
+        await db.commit()
+
+    async def fail(
+        self, db: AsyncSession, *, job: Job, error: str, backoff: int
+    ) -> None:
+        # Exponential backoff until max_attempts, then FAILED for good
+        now = datetime.utcnow()
+        values = {'locked_at': None, 'error': error, 'updated_at': now}
+        if job.attempts >= job.max_attempts:
+            values['status'] = Status.FAILED
+        else:
+            values['status'] = Status.NEW
+            values['run_at'] = now + timedelta(
+                seconds=backoff * 2 ** (job.attempts - 1)
+            )
+        statement = (update(self.model).
+                     where(self.model.id == job.id).
+                     values(**values))
+        await db.execute(statement)
+        await db.commit()
+
+    async def get_by_item(
+        self, db: AsyncSession, *, item_id: int, kind: Optional[str] = None
+    ) -> List[Job]:
+        statement = (select(self.model).
+                     where(self.model.item_id == item_id).
+                     order_by(self.model.id.desc()))
+        if kind:
+            statement = statement.where(self.model.kind == kind)
+        results = await db.execute(statement=statement)
+        return results.scalars().all()
+
+    async def count_active(
+        self, db: AsyncSession
+    ) -> List[Tuple[str, Status, int]]:
+        # (kind, status, count) of queued and running jobs
+        statement = (select(self.model.kind, self.model.status, func.count()).
+                     where(ACTIVE_PREDICATE).
+                     group_by(self.model.kind, self.model.status))
+        results = await db.execute(statement=statement)
+        return results.all()
+
+
+job = CRUDJob(Job)
@@ -1,10 +1,20 @@
+from typing import Dict, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from crud.base import CRUDBase  # noqa
 from models.source import Source  # noqa
 from schemas.source import SourceCreate, SourceUpdate  # noqa
 
 
 class CRUDSource(CRUDBase[Source, SourceCreate, SourceUpdate]):
-    pass
+    async def get_by_domains(
+        self, db: AsyncSession, *, domains: Iterable[str]
+    ) -> Dict[str, Source]:
+        statement = select(Source).where(Source.domain.in_(set(domains)))
+        results = await db.execute(statement=statement)
+        return {source.domain: source for source in results.scalars()}
 
 
 source = CRUDSource(Source)
@@ -0,0 +1,91 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import func, literal_column, select, tuple_, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud.base import CRUDBase  # noqa
+from models.item import Item  # noqa
+from models.source import Source  # noqa
+from models.stage_timing import StageTiming  # noqa
+from schemas.stage_timing import StageTimingCreate  # noqa
+
+
+# Percentiles reported per stage
+PERCENTILES = {'p50': 0.5, 'p95': 0.95}
+
+
+class CRUDStageTiming(
+    CRUDBase[StageTiming, StageTimingCreate, StageTimingCreate]
+):
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: List[StageTimingCreate]
+    ) -> None:
+        # Rows without a trace id take the one of their item
+        if not objs_in:
+            return
+        values = []
+        for obj_in in objs_in:
+            row = obj_in.model_dump()
+            row['duration'] = (
+                obj_in.finished_at - obj_in.started_at
+            ).total_seconds()
+            if row['trace_id'] is None:
+                row['trace_id'] = (select(Item.trace_id).
+                                   where(Item.id == obj_in.item_id).
+                                   scalar_subquery())
+            values.append(row)
+        await db.execute(insert(self.model).values(values))
+        await db.commit()
+
+    async def get_by_item(
+        self, db: AsyncSession, *, item_id: int
+    ) -> List[StageTiming]:
+        statement = (select(self.model).
+                     where(self.model.item_id == item_id).
+                     order_by(self.model.started_at, self.model.id))
+        results = await db.execute(statement=statement)
+        return results.scalars().all()
+
+    async def get_stats(
+        self, db: AsyncSession, *, since: datetime,
+        source_id: Optional[int] = None
+    ) -> List[tuple]:
+        """
+        (stage, source name, count, p50, p95) for every stage over all
+        sources (source name None) and for each source. The "total" stage
+        spans an article from its first stage start to its last stage end.
+        """
+        stages = (select(self.model.item_id, self.model.stage,
+                         self.model.duration).
+                  where(self.model.started_at >= since))
+        total = (select(self.model.item_id,
+                        literal_column("'total'").label('stage'),
+                        func.extract(
+                            'epoch',
+                            func.max(self.model.finished_at) -
+                            func.min(self.model.started_at)
+                        ).label('duration')).
+                 where(self.model.started_at >= since).
+                 group_by(self.model.item_id))
+        timings = union_all(stages, total).subquery()
+        statement = (select(timings.c.stage, Source.name,
+                            func.count(),
+                            *(func.percentile_cont(q).
+                              within_group(timings.c.duration)
+                              for q in PERCENTILES.values())).
+                     join(Item, Item.id == timings.c.item_id).
+                     join(Source, Source.id == Item.source_id).
+                     group_by(func.grouping_sets(
+                         tuple_(timings.c.stage),
+                         tuple_(timings.c.stage, Source.name)
+                     )).
+                     order_by(timings.c.stage, Source.name.nulls_first()))
+        if source_id is not None:
+            statement = statement.where(Item.source_id == source_id)
+        results = await db.execute(statement=statement)
+        return results.all()
+
+
+stage_timing = CRUDStageTiming(StageTiming)
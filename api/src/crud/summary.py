@@ -0,0 +1,30 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud.base import CRUDBase  # noqa
+from models.summary import Summary  # noqa
+from schemas.summary import SummaryCreate  # noqa
+
+
+class CRUDSummary(CRUDBase[Summary, SummaryCreate, SummaryCreate]):
+    async def get_by_key(
+        self, db: AsyncSession, *, key: str
+    ) -> Optional[Summary]:
+        statement = select(self.model).where(self.model.key == key)
+        results = await db.execute(statement=statement)
+        return results.scalar_one_or_none()
+
+    async def create_or_skip(
+        self, db: AsyncSession, *, obj_in: SummaryCreate
+    ) -> None:
+        statement = (insert(self.model).
+                     values(**obj_in.model_dump()).
+                     on_conflict_do_nothing(index_elements=['key']))
+        await db.execute(statement)
+        await db.commit()
+
+
+summary = CRUDSummary(Summary)
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud.base import CRUDBase  # noqa
+from models.telegram_message import TelegramMessage  # noqa
+from schemas.telegram_message import TelegramMessageCreate  # noqa
+from schemas.status import Status
+
+
+class CRUDTelegramMessage(
+    CRUDBase[TelegramMessage, TelegramMessageCreate, TelegramMessageCreate]
+):
+    async def claim(
+        self, db: AsyncSession, *, limit: int, lock_timeout: int
+    ) -> List[TelegramMessage]:
+        # Due messages in creation order, plus ones left IN_PROGRESS by
+        # a dispatcher that died mid-send
+        now = datetime.utcnow()
+        statement = (select(self.model.id).
+                     where(or_(
+                         and_(self.model.status == Status.NEW,
+                              self.model.send_at <= now),
+                         and_(self.model.status == Status.IN_PROGRESS,
+                              self.model.locked_at <
+                              now - timedelta(seconds=lock_timeout)),
+                     )).
+                     order_by(self.model.id).
+                     limit(limit).
+                     with_for_update(skip_locked=True))
+        ids = (await db.execute(statement=statement)).scalars().all()
+        if not ids:
+            await db.commit()
+            return []
+        statement = (update(self.model).
+                     where(self.model.id.in_(ids)).
+                     values(status=Status.IN_PROGRESS, locked_at=now,
+                            attempts=self.model.attempts + 1).
+                     returning(self.model))
+        messages = (await db.execute(statement)).scalars().all()
+        await db.commit()
+        return sorted(messages, key=lambda message: message.id)
+
+    async def set_status(
+        self, db: AsyncSession, *, ids: List[int], status: Status,
+        error: str = None, send_at: datetime = None
+    ) -> None:
+        values = {'status': status, 'locked_at': None, 'error': error}
+        if status == Status.DONE:
+            values['sent_at'] = datetime.utcnow()
+        if send_at is not None:
+            values['send_at'] = send_at
+        statement = (update(self.model).
+                     where(self.model.id.in_(ids)).
+                     values(**values))
+        await db.execute(statement)
+        await db.commit()
+
+    async def postpone(
+        self, db: AsyncSession, *, ids: List[int], send_at: datetime,
+        error: str = None
+    ) -> None:
+        # Rate limited or held back behind an earlier message of the
+        # chat: back to the queue without spending an attempt
+        statement = (update(self.model).
+                     where(self.model.id.in_(ids)).
+                     values(status=Status.NEW, locked_at=None, error=error,
+                            send_at=send_at,
+                            attempts=self.model.attempts - 1))
+        await db.execute(statement)
+        await db.commit()
+
+    async def count_active(
+        self, db: AsyncSession
+    ) -> List[Tuple[Status, int]]:
+        # (status, count) of queued and sending messages
+        statement = (select(self.model.status, func.count()).
+                     where(self.model.status.in_(
+                         [Status.NEW, Status.IN_PROGRESS]
+                     )).
+                     group_by(self.model.status))
+        results = await db.execute(statement=statement)
+        return results.all()
+
+
+telegram_message = CRUDTelegramMessage(TelegramMessage)
@@ -0,0 +1,37 @@
+from typing import Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud.base import CRUDBase  # noqa
+from models.translation import Translation  # noqa
+from schemas.translation import TranslationCreate  # noqa
+
+
+class CRUDTranslation(
+    CRUDBase[Translation, TranslationCreate, TranslationCreate]
+):
+    async def get_texts_by_keys(
+        self, db: AsyncSession, *, keys: List[str]
+    ) -> Dict[str, str]:
+        if not keys:
+            return {}
+        statement = (select(self.model.key, self.model.text).
+                     where(self.model.key.in_(keys)))
+        results = await db.execute(statement=statement)
+        return dict(results.all())
+
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: List[TranslationCreate]
+    ) -> None:
+        if not objs_in:
+            return
+        statement = (insert(self.model).
+                     values([obj_in.model_dump() for obj_in in objs_in]).
+                     on_conflict_do_nothing(index_elements=['key']))
+        await db.execute(statement)
+        await db.commit()
+
+
+translation = CRUDTranslation(Translation)
@@ -1,5 +1,7 @@
 ﻿import crud, schemas  # noqa
 from core.config import settings  # noqa
+from sqlalchemy import text
+
 from db.base_class import Base  # noqa
 from db.session import engine, async_session  # noqa
 
@@ -24,13 +26,56 @@ async def create_superuser() -> None:
             pass
 
 
+# Extensions the models depend on, created before the tables
+EXTENSIONS = ['pg_trgm']
+
+# Columns and indexes added after the tables were first created,
+# create_all doesn't alter existing tables
+UPGRADES = [
+    # Keyset pagination scans item newest-first by (created_at, id)
+    'CREATE INDEX IF NOT EXISTS ix_item_created_at_id '
+    'ON item (created_at, id)',
+    "ALTER TABLE item ADD COLUMN IF NOT EXISTS search_en tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', "
+    "coalesce(title, '') || ' ' || coalesce(text, ''))) STORED",
+    "ALTER TABLE item ADD COLUMN IF NOT EXISTS search_ru tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('russian', "
+    "coalesce(title_ru, '') || ' ' || coalesce(text_ru, ''))) STORED",
+    'CREATE INDEX IF NOT EXISTS ix_item_search_en '
+    'ON item USING gin (search_en)',
+    'CREATE INDEX IF NOT EXISTS ix_item_search_ru '
+    'ON item USING gin (search_ru)',
+    'CREATE INDEX IF NOT EXISTS ix_item_title_trgm '
+    'ON item USING gin (title gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_item_url_trgm '
+    'ON item USING gin (url gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_source_domain_trgm '
+    'ON source USING gin (domain gin_trgm_ops)',
+    'ALTER TABLE item ADD COLUMN IF NOT EXISTS trace_id varchar(32)',
+    'CREATE INDEX IF NOT EXISTS ix_item_trace_id ON item (trace_id)',
+    'ALTER TABLE telegram_message ADD COLUMN IF NOT EXISTS item_id integer '
+    'REFERENCES item (id) ON DELETE SET NULL',
+    'ALTER TABLE telegram_message ADD COLUMN IF NOT EXISTS stage varchar(32)',
+    'ALTER TABLE item ADD COLUMN IF NOT EXISTS locked_at timestamp',
+    'ALTER TABLE item ADD COLUMN IF NOT EXISTS attempts integer '
+    'NOT NULL DEFAULT 0',
+    'ALTER TABLE job ADD COLUMN IF NOT EXISTS message_id bigint',
+]
+
+
 # Create tables
 async def init_models() -> None:
     async with engine.begin() as conn:
         if settings.DATABASE_DELETE_ALL:
             await conn.run_sync(Base.metadata.drop_all)
         if settings.DATABASE_CREATE_ALL:
+            for extension in EXTENSIONS:
+                await conn.execute(
+                    text(f'CREATE EXTENSION IF NOT EXISTS {extension}')
+                )
             await conn.run_sync(Base.metadata.create_all)
+            for statement in UPGRADES:
+                await conn.execute(text(statement))
 
 
 async def init_db() -> None:
@@ -2,6 +2,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession  # noqa
 
 from core.config import settings  # noqa
+from core.metrics import TimedPool, register_engine  # noqa
 
 
 url = settings.POSTGRES_DSN
@@ -9,8 +10,9 @@ url = settings.POSTGRES_DSN
 engine = create_async_engine(
     str(url), future=True, echo=False, pool_pre_ping=True,
     pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=settings.DATABASE_MAX_OVERFLOW
+    max_overflow=settings.DATABASE_MAX_OVERFLOW, poolclass=TimedPool
 )
+register_engine(engine)
 
 async_session = sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False,
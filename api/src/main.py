@@ -1,6 +1,7 @@
+import asyncio
 import uvicorn
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -8,17 +9,29 @@ from contextlib import asynccontextmanager
 
 from core.logger import LOGGING   # noqa
 from core.config import settings
+from core.metrics import (
+    CONTENT_TYPE_LATEST, MetricsMiddleware, get_metrics, monitor_event_loop
+)
 
 from db.init_db import init_db
+from services.html_executor import html_executor
+from services.http_clients import http_clients
+from services.job_queue import update_queue_metrics
 from api.v1.api_router import api_router
+from utils.cursor import InvalidCursorError
 
 
 def init_app() -> FastAPI:
     @asynccontextmanager
     async def lifespan(app: FastAPI):
         await init_db()
+        monitor = asyncio.create_task(
+            monitor_event_loop(settings.METRICS_LOOP_LAG_INTERVAL)
+        )
         yield
-        pass
+        monitor.cancel()
+        await http_clients.close()
+        html_executor.shutdown()
 
     app = FastAPI(
         title=settings.PROJECT_NAME,
@@ -36,6 +49,19 @@ def init_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(MetricsMiddleware)
+
+    @app.exception_handler(InvalidCursorError)
+    async def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+        return ORJSONResponse(
+            status_code=400, content={'detail': str(exc) or 'Invalid cursor'}
+        )
+
+    @app.get('/metrics', include_in_schema=False)
+    async def metrics():
+        # Prometheus scrape endpoint, queue depth is read on each scrape
+        await update_queue_metrics()
+        return Response(get_metrics(), media_type=CONTENT_TYPE_LATEST)
 
     app.include_router(api_router, prefix=settings.API_VERSION_PREFIX)
 
@@ -1,4 +1,9 @@
 from .config import Config  # noqa
 from .user import User  # noqa
 from .source import Source  # noqa
-from .item import Item  # noqa
\ No newline at end of file
+from .item import Item  # noqa
+from .translation import Translation  # noqa
+from .job import Job  # noqa
+from .telegram_message import TelegramMessage  # noqa
+from .summary import Summary  # noqa
+from .stage_timing import StageTiming  # noqa
\ No newline at end of file
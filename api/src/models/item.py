@@ -2,9 +2,11 @@ from typing import TYPE_CHECKING
 from datetime import datetime
 
 from sqlalchemy import (
-    Column, ForeignKey, Integer, BigInteger, String, Text, DateTime, Enum
+    Column, ForeignKey, Integer, BigInteger, String, Text, DateTime, Enum,
+    Index, Computed
 )  # noqa
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 
 from db.base_class import Base  # noqa
 
@@ -16,9 +18,23 @@ if TYPE_CHECKING:
 
 
 class Item(Base):
+    __table_args__ = (
+        # Serves keyset pagination over (created_at, id)
+        Index('ix_item_created_at_id', 'created_at', 'id'),
+        Index('ix_item_search_en', 'search_en', postgresql_using='gin'),
+        Index('ix_item_search_ru', 'search_ru', postgresql_using='gin'),
+        # Trigram indexes for contains/startswith/endswith filters
+        Index('ix_item_title_trgm', 'title', postgresql_using='gin',
+              postgresql_ops={'title': 'gin_trgm_ops'}),
+        Index('ix_item_url_trgm', 'url', postgresql_using='gin',
+              postgresql_ops={'url': 'gin_trgm_ops'}),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     source_id = Column(Integer, ForeignKey('source.id'))
     job_id = Column(String, nullable=True)
+    # Created at scheduling, ties the stage timings of one article together
+    trace_id = Column(String(32), nullable=True, index=True)
     user_id = Column(Integer, ForeignKey('user.id'))
     chat_id = Column(BigInteger, index=True)
     url = Column(String, unique=True, nullable=False)
@@ -35,6 +51,20 @@ class Item(Base):
     date = Column(DateTime)
     tags = Column(String, nullable=True)
     status = Column(Enum(Status), default=Status.NEW)
+    # Crawl worker lease: claim time and number of claims
+    locked_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Full-text search vectors, maintained by Postgres
+    search_en = deferred(Column(TSVECTOR, Computed(
+        "to_tsvector('english', "
+        "coalesce(title, '') || ' ' || coalesce(text, ''))",
+        persisted=True
+    )))
+    search_ru = deferred(Column(TSVECTOR, Computed(
+        "to_tsvector('russian', "
+        "coalesce(title_ru, '') || ' ' || coalesce(text_ru, ''))",
+        persisted=True
+    )))
     source = relationship('Source', lazy='joined')
     user = relationship('User', back_populates='items', lazy='joined')
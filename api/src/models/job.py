@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Column, ForeignKey, Integer, BigInteger, String, Text, DateTime, Enum,
+    Index
+)  # noqa
+
+from db.base_class import Base  # noqa
+
+from schemas.status import Status
+
+
+class Job(Base):
+    __table_args__ = (
+        # One active job per idempotency key, finished ones may repeat
+        Index(
+            'ix_job_active_key', 'idempotency_key', unique=True,
+            postgresql_where="status IN ('NEW', 'IN_PROGRESS')"
+        ),
+        Index('ix_job_kind_status_run_at', 'kind', 'status', 'run_at'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(32), nullable=False)
+    item_id = Column(Integer, ForeignKey('item.id', ondelete='CASCADE'))
+    # Bot message the job reports into instead of posting a new one
+    message_id = Column(BigInteger, nullable=True)
+    idempotency_key = Column(String, nullable=False)
+    status = Column(Enum(Status), default=Status.NEW, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    run_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String  # noqa
+from sqlalchemy import Column, Integer, String, Index  # noqa
 
 from db.base_class import Base  # noqa
 
 
 class Source(Base):
+    __table_args__ = (
+        Index('ix_source_domain_trgm', 'domain', postgresql_using='gin',
+              postgresql_ops={'domain': 'gin_trgm_ops'}),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     domain = Column(String, nullable=False)
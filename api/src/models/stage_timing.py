@@ -0,0 +1,26 @@
+from sqlalchemy import (
+    Column, ForeignKey, Integer, String, Float, Text, DateTime, Index
+)  # noqa
+
+from db.base_class import Base  # noqa
+
+
+class StageTiming(Base):
+    __table_args__ = (
+        # Serves the percentile report over a time window
+        Index('ix_stage_timing_stage_started_at', 'stage', 'started_at'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(
+        Integer, ForeignKey('item.id', ondelete='CASCADE'), index=True
+    )
+    trace_id = Column(String(32), nullable=True, index=True)
+    # schedule, download, parse, telegraph, database, webhook, notify,
+    # translate, summarize, telegram_*
+    stage = Column(String(32), nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=False)
+    # Seconds, kept apart so percentiles don't recompute the interval
+    duration = Column(Float, nullable=False)
+    error = Column(Text, nullable=True)
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, DateTime  # noqa
+
+from db.base_class import Base  # noqa
+
+
+class Summary(Base):
+    id = Column(Integer, primary_key=True, index=True)
+    # sha256 of "model:prompt version:source:normalized text"
+    key = Column(String(64), unique=True, nullable=False)
+    model = Column(String, nullable=True)
+    prompt_version = Column(String(16), nullable=False)
+    text = Column(Text, nullable=False)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    total_tokens = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger, Column, ForeignKey, Integer, String, Text, DateTime, Enum,
+    Index
+)  # noqa
+from sqlalchemy.dialects.postgresql import JSONB
+
+from db.base_class import Base  # noqa
+
+from schemas.status import Status
+
+
+class TelegramMessage(Base):
+    __table_args__ = (
+        Index('ix_telegram_message_status_send_at', 'status', 'send_at'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    chat_id = Column(BigInteger, nullable=False)
+    method = Column(String(32), default='sendMessage', nullable=False)
+    payload = Column(JSONB, nullable=False)
+    status = Column(Enum(Status), default=Status.NEW, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    send_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+    # Article the message belongs to, its delivery is a traced stage
+    item_id = Column(
+        Integer, ForeignKey('item.id', ondelete='SET NULL'), nullable=True
+    )
+    stage = Column(String(32), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
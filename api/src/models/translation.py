@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, DateTime  # noqa
+
+from db.base_class import Base  # noqa
+
+
+class Translation(Base):
+    id = Column(Integer, primary_key=True, index=True)
+    # sha256 of "source:target:normalized segment"
+    key = Column(String(64), unique=True, nullable=False)
+    source = Column(String(16), nullable=False)
+    target = Column(String(16), nullable=False)
+    source_text = Column(Text, nullable=False)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
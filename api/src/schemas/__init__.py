@@ -1,8 +1,13 @@
-﻿from .base import Filter, Order  # noqa
+﻿from .base import Filter, Order, CountStrategy  # noqa
 from .token import Token, TokenPayload  # noqa
 from .config import Config, ConfigCreate, ConfigInDB, ConfigUpdate, ConfigRows  # noqa
 from .user import User, UserCreate, UserInDB, UserUpdate, UserRows  # noqa
-from .item import Item, ItemCreate, ItemInDB, ItemUpdate, ItemRows  # noqa
+from .item import Item, ItemCreate, ItemInDB, ItemUpdate, ItemRows, ItemListEntry, ItemSearchHit, ItemSearchRows  # noqa
 from .source import Source, SourceCreate, SourceInDB, SourceUpdate, SourceRows  # noqa
-from .scrapyd import ScrapydRequest
-from .status import Status
\ No newline at end of file
+from .scrapyd import ScrapydRequest, ScrapydBulkRequest, ScrapydBulkResult, ScrapydBulkRows  # noqa
+from .status import Status
+from .translation import TranslationCreate  # noqa
+from .job import Job, JobCreate, JobKind, JobRows  # noqa
+from .telegram_message import TelegramMessageCreate  # noqa
+from .summary import SummaryCreate  # noqa
+from .stage_timing import StageTiming, StageTimingCreate, StageStats, StageStatsRows, Trace  # noqa
\ No newline at end of file
@@ -8,11 +8,16 @@ class Filter(BaseModel):
     field: str
     operator: Literal[
         'eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'startswith', 'endswith',
-        'contains', 'doesnotcontain', 'in', 'isnull', 'isnotnull'
+        'contains', 'doesnotcontain', 'istartswith', 'iendswith',
+        'icontains', 'idoesnotcontain', 'in', 'isnull', 'isnotnull'
     ]
     value: Optional[Any] = None
 
 
+# How list endpoints compute `total`
+CountStrategy = Literal['exact', 'estimate', 'cached', 'none']
+
+
 class Order(BaseModel):
     field: str
     dir: Literal['ASC', 'DESC', 'asc', 'desc']
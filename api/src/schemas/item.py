@@ -12,6 +12,7 @@ class ItemBase(BaseModel):
     source_id: Optional[str] = None
     url: Optional[str] = None
     job_id: Optional[str] = None
+    trace_id: Optional[str] = None
     chat_id: Optional[int] = None
     title: Optional[str] = None
     title_ru: Optional[str] = None
@@ -60,7 +61,28 @@ class ItemInDB(ItemInDBBase):
     pass
 
 
+# Item in list responses, heavy text columns only when requested
+class ItemListEntry(ItemBase):
+    id: Optional[int] = None
+    source_id: Optional[int] = None
+    user_id: Optional[int] = None
+    user: Optional[User] = None
+
+
 # List of items to return via API
 class ItemRows(BaseModel):
-    data: List[Item]
-    total: int
+    data: List[ItemListEntry]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+# Full-text search hit with relevance and highlighted fragments
+class ItemSearchHit(BaseModel):
+    item: ItemListEntry
+    rank: float
+    snippet: Optional[str] = None
+
+
+# List of search hits to return via API
+class ItemSearchRows(BaseModel):
+    data: List[ItemSearchHit]
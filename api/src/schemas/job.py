@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+from schemas.status import Status
+
+
+JobKind = Literal['translate', 'summarize', 'publish']
+
+
+# Properties to receive on job creation
+class JobCreate(BaseModel):
+    kind: JobKind
+    item_id: int
+    message_id: Optional[int] = None
+    idempotency_key: str
+    max_attempts: Optional[int] = None
+
+
+# Properties to return to client
+class Job(BaseModel):
+    id: int
+    kind: str
+    item_id: Optional[int] = None
+    message_id: Optional[int] = None
+    idempotency_key: str
+    status: Status
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# List of jobs to return via API
+class JobRows(BaseModel):
+    data: List[Job]
@@ -1,7 +1,26 @@
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
 
 
 class ScrapydRequest(BaseModel):
     source_name: str
     source_url: str
-    spider_name: str
\ No newline at end of file
+    spider_name: str
+
+# Many article URLs scheduled in one call
+class ScrapydBulkRequest(BaseModel):
+    urls: List[str] = Field(..., min_length=1, max_length=500)
+    chat_id: Optional[int] = None
+
+
+class ScrapydBulkResult(BaseModel):
+    url: str
+    status: Literal['scheduled', 'exists', 'unsupported', 'failed']
+    item_id: Optional[int] = None
+    job_id: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class ScrapydBulkRows(BaseModel):
+    data: List[ScrapydBulkResult]
@@ -44,4 +44,5 @@ class SourceInDB(SourceInDBBase):
 # List of items to return via API
 class SourceRows(BaseModel):
     data: List[Source]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+# Properties to receive on stage timing creation
+class StageTimingCreate(BaseModel):
+    item_id: int
+    trace_id: Optional[str] = None
+    stage: str
+    started_at: datetime
+    finished_at: datetime
+    error: Optional[str] = None
+
+
+# Properties to return to client
+class StageTiming(BaseModel):
+    stage: str
+    started_at: datetime
+    finished_at: datetime
+    duration: float
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+# Stage timings of one article, in start order
+class Trace(BaseModel):
+    item_id: int
+    trace_id: Optional[str] = None
+    duration: Optional[float] = None
+    data: List[StageTiming]
+
+
+# Duration percentiles of a stage, seconds
+class StageStats(BaseModel):
+    stage: str
+    source: Optional[str] = None
+    count: int
+    p50: float
+    p95: float
+
+
+class StageStatsRows(BaseModel):
+    data: List[StageStats]
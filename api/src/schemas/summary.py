@@ -0,0 +1,15 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+# Properties to receive on summary cache entry creation
+class SummaryCreate(BaseModel):
+    key: str
+    model: Optional[str] = None
+    prompt_version: str
+    text: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+
@@ -0,0 +1,12 @@
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+
+# Properties to receive on message creation
+class TelegramMessageCreate(BaseModel):
+    chat_id: int
+    method: str = 'sendMessage'
+    payload: Dict[str, Any]
+    item_id: Optional[int] = None
+    stage: Optional[str] = None
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+# Properties to receive on translation memory entry creation
+class TranslationCreate(BaseModel):
+    key: str
+    source: str
+    target: str
+    source_text: str
+    text: str
@@ -42,4 +42,5 @@ class UserInDB(UserInDBBase):
 # List of users to return via API
 class UserRows(BaseModel):
     data: List[User]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional
+
+from core.config import settings
+from utils import html_cleaner
+
+
+class HTMLExecutor:
+    """
+    Пул процессов для разбора HTML (BeautifulSoup, html_to_nodes):
+    разбор статьи занимает десятки миллисекунд CPU и в потоке всё равно
+    держит GIL, тормозя event loop. Функции и аргументы должны
+    передаваться между процессами (функции уровня модуля, строки,
+    списки). С processes=0 работа идёт в потоках, как раньше.
+    """
+
+    def __init__(self, processes: int = 2):
+        self.processes = processes
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.lock = threading.Lock()
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.pool is None:
+                # spawn: a fork would copy the loop, sockets and threads
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self.pool
+
+    def replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        # Concurrent callers see the same broken pool, only the first
+        # one drops it: the others must not shut down its replacement
+        with self.lock:
+            if self.pool is not broken:
+                return
+            self.pool = None
+        logging.error('HTML process pool broken, restarting')
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        call = partial(func, *args, **kwargs)
+        if self.processes <= 0:
+            return await asyncio.to_thread(call)
+        loop = asyncio.get_running_loop()
+        pool = self.get_pool()
+        try:
+            return await loop.run_in_executor(pool, call)
+        except BrokenProcessPool:
+            # A crashed worker breaks the whole pool, start a new one
+            self.replace_pool(pool)
+            return await loop.run_in_executor(self.get_pool(), call)
+
+    async def clean_html(self, html_content, allowed_tags=None,
+                         tag_replacements=None) -> str:
+        return await self.run(
+            html_cleaner.clean_html, html_content, allowed_tags,
+            tag_replacements
+        )
+
+    def shutdown(self) -> None:
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+html_executor = HTMLExecutor(settings.HTML_PROCESSES)
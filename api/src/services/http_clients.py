@@ -0,0 +1,68 @@
+import aiohttp
+import httpx
+import logging
+import openai
+
+from typing import Dict, Optional
+
+from core.config import settings
+
+
+class HTTPClients:
+    """
+    Общие HTTP-клиенты процесса: одна aiohttp-сессия на назначение
+    и один клиент OpenAI, с keep-alive пулами и лимитом соединений
+    на хост. Создаются при первом обращении, закрываются в lifespan.
+    """
+
+    def __init__(self):
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        self.openai_client: Optional[openai.AsyncOpenAI] = None
+
+    def get_session(self, name: str = 'default') -> aiohttp.ClientSession:
+        session = self.sessions.get(name)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.HTTP_POOL_SIZE,
+                limit_per_host=settings.HTTP_POOL_SIZE_PER_HOST,
+                keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.HTTP_TIMEOUT),
+            )
+            self.sessions[name] = session
+        return session
+
+    def get_openai(self) -> openai.AsyncOpenAI:
+        if self.openai_client is None:
+            self.openai_client = openai.AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                http_client=httpx.AsyncClient(
+                    verify=False,
+                    proxy=settings.OPENAI_PROXY_URL
+                    if settings.OPENAI_PROXY_URL else None,
+                    limits=httpx.Limits(
+                        max_connections=settings.HTTP_POOL_SIZE_PER_HOST,
+                        max_keepalive_connections=(
+                            settings.HTTP_POOL_SIZE_PER_HOST
+                        ),
+                        keepalive_expiry=settings.HTTP_KEEPALIVE_TIMEOUT,
+                    ),
+                )
+            )
+        return self.openai_client
+
+    async def close(self) -> None:
+        for name, session in self.sessions.items():
+            if not session.closed:
+                await session.close()
+        self.sessions.clear()
+        if self.openai_client is not None:
+            await self.openai_client.close()
+            self.openai_client = None
+        logging.info('HTTP clients closed')
+
+
+http_clients = HTTPClients()
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import traceback
+
+from typing import Awaitable, Callable, Dict, Optional
+
+from core.config import settings
+from core.metrics import JOBS, JOBS_IN_FLIGHT, QUEUE_DEPTH
+from db.session import async_session
+from services.tasks import publish_item, translate_item, summarize_item
+from services.tracing import trace_stage
+
+import crud, models, schemas  # noqa
+
+
+# Job kind -> coroutine taking the item id (and message_id, if the job
+# has one)
+HANDLERS: Dict[str, Callable[..., Awaitable[None]]] = {
+    'translate': translate_item,
+    'summarize': summarize_item,
+    'publish': publish_item,
+}
+
+# Max jobs of each kind running at once in one worker
+CONCURRENCY = {
+    'translate': settings.JOB_CONCURRENCY_TRANSLATE,
+    'summarize': settings.JOB_CONCURRENCY_SUMMARIZE,
+    'publish': settings.JOB_CONCURRENCY_PUBLISH,
+}
+
+
+def get_idempotency_key(kind: str, item_id: int) -> str:
+    return f'{kind}:{item_id}'
+
+
+async def enqueue(db, kind: str, item_id: int,
+                  message_id: Optional[int] = None) -> models.Job:
+    """
+    Ставит задачу в очередь. Повторный вызов, пока задача с тем же
+    ключом ждёт или выполняется, возвращает уже существующую.
+    message_id - сообщение бота, которое задача заполнит результатом.
+    """
+    return await crud.job.enqueue(db, obj_in=schemas.JobCreate(
+        kind=kind, item_id=item_id, message_id=message_id,
+        idempotency_key=get_idempotency_key(kind, item_id),
+        max_attempts=settings.JOB_MAX_ATTEMPTS
+    ))
+
+
+async def run_job(job: models.Job) -> None:
+    """
+    Выполняет задачу и записывает результат: DONE, либо повтор
+    с экспоненциальной задержкой, либо FAILED после последней попытки.
+    """
+    logging.info(
+        f'Job {job.id} {job.kind} item_id={job.item_id} '
+        f'attempt {job.attempts}/{job.max_attempts}'
+    )
+    try:
+        async with trace_stage(job.item_id, job.kind):
+            if job.message_id:
+                await HANDLERS[job.kind](job.item_id, job.message_id)
+            else:
+                await HANDLERS[job.kind](job.item_id)
+    except Exception as e:
+        logging.exception(f'Job {job.id} {job.kind} failed: {e}')
+        JOBS.labels(job.kind, 'error').inc()
+        async with async_session() as db:
+            await crud.job.fail(
+                db, job=job, error=traceback.format_exc(limit=5),
+                backoff=settings.JOB_RETRY_BACKOFF
+            )
+        return
+    async with async_session() as db:
+        await crud.job.complete(db, id=job.id)
+    JOBS.labels(job.kind, 'done').inc()
+
+
+async def update_queue_metrics() -> None:
+    """
+    Обновляет глубину очередей задач и исходящих сообщений Telegram
+    перед отдачей метрик. Если база недоступна, ошибка только
+    логируется и остаются прежние значения: остальные метрики должны
+    отдаваться и во время сбоя.
+    """
+    depth = {
+        (queue, status.name): 0
+        for queue in [*HANDLERS, 'telegram']
+        for status in (schemas.Status.NEW, schemas.Status.IN_PROGRESS)
+    }
+    try:
+        async with async_session() as db:
+            for kind, status, count in await crud.job.count_active(db):
+                depth[kind, status.name] = count
+            for status, count in await crud.telegram_message.count_active(db):
+                depth['telegram', status.name] = count
+    except Exception as e:
+        logging.error(f'Queue depth not updated: {e}')
+        return
+    for (queue, status), count in depth.items():
+        QUEUE_DEPTH.labels(queue, status).set(count)
+
+
+class Worker:
+    """
+    Забирает задачи из таблицы job через SELECT ... FOR UPDATE SKIP
+    LOCKED, так что несколько воркеров не получат одну и ту же задачу.
+    Число одновременно выполняемых задач ограничено отдельно для
+    каждого вида.
+    """
+
+    def __init__(self, concurrency: Dict[str, int] = None):
+        self.concurrency = concurrency or CONCURRENCY
+        self.running: Dict[str, set] = {kind: set() for kind in HANDLERS}
+        for kind, tasks in self.running.items():
+            JOBS_IN_FLIGHT.labels(kind).set_function(
+                lambda tasks=tasks: len(tasks)
+            )
+        self.stopping = asyncio.Event()
+
+    async def poll(self) -> int:
+        claimed = 0
+        for kind, tasks in self.running.items():
+            free = self.concurrency.get(kind, 1) - len(tasks)
+            if free <= 0:
+                continue
+            async with async_session() as db:
+                jobs = await crud.job.claim(
+                    db, kind=kind, limit=free,
+                    lock_timeout=settings.JOB_LOCK_TIMEOUT
+                )
+            for job in jobs:
+                task = asyncio.create_task(run_job(job))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            claimed += len(jobs)
+        return claimed
+
+    async def run(self) -> None:
+        logging.info(f'Job worker started, concurrency {self.concurrency}')
+        while not self.stopping.is_set():
+            try:
+                claimed = await self.poll()
+            except Exception as e:
+                logging.exception(f'Job poll failed: {e}')
+                claimed = 0
+            if claimed:
+                continue
+            try:
+                await asyncio.wait_for(
+                    self.stopping.wait(), settings.JOB_POLL_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+        # Let running jobs finish, the rest stays queued
+        pending = [task for tasks in self.running.values() for task in tasks]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        logging.info('Job worker stopped')
+
+    def stop(self) -> None:
+        self.stopping.set()
@@ -1,11 +1,122 @@
-from telegraph import Telegraph
+import aiohttp
+import asyncio
+import logging
+
+from typing import Dict, List, Optional
+
+from telegraph.exceptions import TelegraphException, RetryAfterError
+from telegraph.utils import html_to_nodes, json_dumps
+
 from core.config import settings
+from core.metrics import track_call
+from services.html_executor import html_executor
+from services.http_clients import http_clients
+
+
+TELEGRAPH_API_URL = 'https://api.telegra.ph/{method}'
+
+
+class TelegraphServerError(TelegraphException):
+    pass
+
+
+# Retried with backoff, API errors other than FLOOD_WAIT are not
+RETRY_ERRORS = (TelegraphServerError, aiohttp.ClientError, asyncio.TimeoutError)
+
+
+class TelegraphClient:
+    """
+    Асинхронный клиент Telegraph API поверх общей aiohttp-сессии.
+    На FLOOD_WAIT ждёт указанное время (не дольше max_flood_wait),
+    сетевые ошибки и 5xx повторяет с экспоненциальной задержкой.
+    """
+
+    def __init__(self, access_token: Optional[str] = None,
+                 max_retries: int = 3, max_flood_wait: int = 60):
+        self.access_token = access_token
+        self.max_retries = max_retries
+        self.max_flood_wait = max_flood_wait
+
+    async def request(self, method: str, values: Dict) -> Dict:
+        values = {k: v for k, v in values.items() if v is not None}
+        if 'access_token' not in values and self.access_token:
+            values['access_token'] = self.access_token
+        session = http_clients.get_session('telegraph')
+        url = TELEGRAPH_API_URL.format(method=method)
+        with track_call('telegraph', method):
+            async with session.post(url, data=values) as response:
+                if response.status >= 500:
+                    raise TelegraphServerError(
+                        f'{method}: HTTP {response.status}'
+                    )
+                data = await response.json(content_type=None)
+            if data.get('ok'):
+                return data['result']
+            error = data.get('error')
+            if isinstance(error, str) and error.startswith('FLOOD_WAIT_'):
+                raise RetryAfterError(int(error.rsplit('_', 1)[-1]))
+            raise TelegraphException(error)
+
+    async def method(self, method: str, values: Dict) -> Dict:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self.request(method, values)
+            except RetryAfterError as e:
+                if attempt == self.max_retries or \
+                        e.retry_after > self.max_flood_wait:
+                    raise
+                delay = e.retry_after
+            except RETRY_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+                delay = 2 ** attempt
+            logging.warning(
+                f'Telegraph {method} retry {attempt + 1} in {delay}s'
+            )
+            await asyncio.sleep(delay)
+
+    async def create_page(self, title: str, content: List,
+                          author_name: Optional[str] = None,
+                          author_url: Optional[str] = None) -> Dict:
+        # content is a list of Telegraph nodes, see build_content
+        return await self.method('createPage', {
+            'title': title,
+            'author_name': author_name,
+            'author_url': author_url,
+            'content': json_dumps(content),
+        })
+
+    async def create_account(self, short_name: str,
+                             author_name: Optional[str] = None,
+                             author_url: Optional[str] = None) -> Dict:
+        return await self.method('createAccount', {
+            'short_name': short_name,
+            'author_name': author_name,
+            'author_url': author_url,
+        })
+
+
+async def build_content(html: str, source_url: str) -> List:
+    """
+    HTML статьи со ссылкой на источник в узлах Telegraph. Разбирается
+    один раз в пуле процессов HTML, повторные попытки отправляют
+    готовые узлы.
+    """
+    return await html_executor.run(
+        html_to_nodes,
+        f'{html}<p>Источник: <a href="{source_url}">{source_url}</a></p>'
+    )
+
+
+telegraph = TelegraphClient(
+    settings.TELEGRAPH_TOKEN,
+    max_retries=settings.TELEGRAPH_MAX_RETRIES,
+    max_flood_wait=settings.TELEGRAPH_MAX_FLOOD_WAIT
+)
 
 
-def publish_to_telegraph(title, html, source_url):
-    telegraph = Telegraph(settings.TELEGRAPH_TOKEN)
-    html = f'{html}<p>Источник: <a href="{source_url}">{source_url}</a></p>'
-    response = telegraph.create_page(
-        title=title, html_content=html,
+async def publish_to_telegraph(title, html, source_url):
+    page = await telegraph.create_page(
+        title=title, content=await build_content(html, source_url)
     )
-    return 'https://telegra.ph/' + response['path']
\ No newline at end of file
+    return 'https://telegra.ph/' + page['path']
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import time
+
+from typing import Dict, List, Optional
+
+from core.config import settings
+from services.http_clients import http_clients
+
+
+class ScrapydNodeError(Exception):
+    # The node is unreachable or answered with an HTTP error
+    pass
+
+
+class ScrapydClient:
+    """
+    Асинхронный клиент scrapyd для нескольких узлов. Задача уходит на
+    наименее загруженный узел (pending + running из daemonstatus.json),
+    при ошибке - на следующий, а упавший узел пропускается cooldown
+    секунд. Ответ scrapyd со status=error (нет такого паука или
+    проекта) - ошибка запроса, а не узла: он возвращается как есть,
+    без повтора на других узлах.
+    """
+
+    def __init__(self, nodes: List[str], project: str = 'default',
+                 status_ttl: float = 2.0, cooldown: float = 30.0):
+        self.nodes = [node.rstrip('/') for node in nodes]
+        self.project = project
+        self.status_ttl = status_ttl
+        self.cooldown = cooldown
+        # node -> (expires, status), scheduled jobs are added locally
+        self.statuses: Dict[str, tuple] = {}
+        self.down_until: Dict[str, float] = {}
+
+    async def request(self, node: str, method: str, endpoint: str,
+                      **kwargs) -> Dict:
+        session = http_clients.get_session('scrapyd')
+        url = f'{node}/{endpoint}'
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+        except Exception as e:
+            self.down_until[node] = time.monotonic() + self.cooldown
+            self.statuses.pop(node, None)
+            raise ScrapydNodeError(f'{node}: {e}') from e
+        return data
+
+    async def daemon_status(self, node: str) -> Dict:
+        now = time.monotonic()
+        cached = self.statuses.get(node)
+        if cached and cached[0] > now:
+            return cached[1]
+        status = await self.request(node, 'GET', 'daemonstatus.json')
+        self.statuses[node] = (now + self.status_ttl, status)
+        return status
+
+    async def list_jobs(self, node: str,
+                        project: Optional[str] = None) -> Dict:
+        return await self.request(
+            node, 'GET', 'listjobs.json',
+            params={'project': project or self.project}
+        )
+
+    async def get_loads(self) -> Dict[str, Optional[int]]:
+        # node -> pending + running, None for unreachable nodes
+        now = time.monotonic()
+        nodes = [
+            node for node in self.nodes
+            if self.down_until.get(node, 0) <= now
+        ] or self.nodes
+        statuses = await asyncio.gather(
+            *(self.daemon_status(node) for node in nodes),
+            return_exceptions=True
+        )
+        return {
+            node: None if isinstance(status, Exception)
+            else status.get('pending', 0) + status.get('running', 0)
+            for node, status in zip(nodes, statuses)
+        }
+
+    async def schedule(self, spider: str, project: Optional[str] = None,
+                       **spider_args) -> Dict:
+        """
+        Запускает паука на наименее загруженном доступном узле.
+        Возвращает ответ scrapyd с полем node, в том числе ответ
+        с ошибкой. ScrapydNodeError - если недоступны все узлы.
+        """
+        loads = await self.get_loads()
+        candidates = sorted(
+            (node for node, load in loads.items() if load is not None),
+            key=lambda node: loads[node]
+        ) or list(loads)
+        errors = []
+        for node in candidates:
+            try:
+                result = await self.request(
+                    node, 'POST', 'schedule.json', data={
+                        'project': project or self.project,
+                        'spider': spider, **spider_args
+                    }
+                )
+            except ScrapydNodeError as e:
+                logging.warning(f'Scrapyd schedule failed, {e}')
+                errors.append(str(e))
+                continue
+            cached = self.statuses.get(node)
+            if cached and result.get('status') == 'ok':
+                cached[1]['pending'] = cached[1].get('pending', 0) + 1
+            return {**result, 'node': node}
+        raise ScrapydNodeError('; '.join(errors) or 'No scrapyd nodes')
+
+    async def nodes_status(self) -> List[Dict]:
+        statuses = await asyncio.gather(
+            *(self.request(node, 'GET', 'daemonstatus.json')
+              for node in self.nodes),
+            return_exceptions=True
+        )
+        return [
+            {'node': node, 'status': 'down', 'message': str(status)}
+            if isinstance(status, Exception) else {'node': node, **status}
+            for node, status in zip(self.nodes, statuses)
+        ]
+
+
+scrapyd = ScrapydClient(
+    [node.strip() for node in settings.SCRAPYD_URLS.split(',') if node.strip()],
+    project=settings.SCRAPYD_PROJECT,
+    status_ttl=settings.SCRAPYD_STATUS_TTL,
+    cooldown=settings.SCRAPYD_NODE_COOLDOWN
+)
@@ -1,34 +1,157 @@
+import asyncio
+import codecs
+import logging
+import re
+
+from typing import Awaitable, Callable, Dict, List, Optional
+
 import openai
-import httpx
 from fastapi import HTTPException
 from core.config import settings
+from core.metrics import track_call
+from services.http_clients import http_clients
+from services.summary_cache import (
+    SummaryResult, get_summary_key, summary_cache
+)
 
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
 
-async def openai_summarize(source_name: str, title: str, text: str) -> str:
-    """
-    Получить краткое содержание текста с использованием OpenAI API.
 
-    :param text: Полный текст статьи.
-    :param openai_api_key: Ключ API OpenAI.
-    :param max_tokens: Максимальное количество токенов для ответа.
-    :param temperature: Уровень "случайности" ответа модели .
-    :param proxy_url: URL прокси-сервера.
-    :return: Краткое содержание текста.
+# Bump when the prompt below changes, cached summaries are keyed by it
+PROMPT_VERSION = '1'
+
+CONTEXT = 'Ты профессиональный журналист, создающий лаконичные саммари новостей.'
+
+# Map step of long articles: condensed notes, merged by the main prompt
+SECTION_PROMPT = '''
+            Это часть {index} из {count} публикации СМИ.
+            Выпиши на русском языке все ключевые факты, цифры, данные, имена и самые яркие цитаты с указанием автора и его должности.
+            Сохраняй тональность оригинала. Пиши сжато, без вступлений и выводов.
+            Оригинальный заголовок: {title}
+            Текст части: {text}
+            '''
+
+PARAGRAPHS = re.compile(r'\n\s*\n')
+SENTENCES = re.compile(r'(?<=[.!?…])\s+')
+
+# Rough chars per token when tiktoken is unavailable, Cyrillic is denser
+CHARS_PER_TOKEN = 3
+
+_encoding = None
+
+# Called with the summary text received so far while streaming
+OnUpdate = Callable[[str], Awaitable[None]]
+
+
+async def openai_summarize(source_name: str, title: str, text: str,
+                           on_update: Optional[OnUpdate] = None) -> str:
+    """
+    Краткое содержание текста: из кэша саммари по хэшу содержимого,
+    иначе через OpenAI API. Одинаковые тексты не оплачиваются дважды.
+    С on_update ответ модели читается потоком, и on_update получает
+    накопленный текст по мере генерации.
     """
     if not text.strip():
         raise HTTPException(
             status_code=400, detail='Текст статьи не может быть пустым.'
         )
-
-    client = openai.AsyncOpenAI(
-        api_key=settings.OPENAI_API_KEY,
-        http_client=httpx.AsyncClient(
-            verify=False,
-            proxy=settings.OPENAI_PROXY_URL \
-                if settings.OPENAI_PROXY_URL else None,
-        )
+    key = get_summary_key(
+        text, source_name, settings.OPENAI_MODEL, PROMPT_VERSION
+    )
+    summary, _ = await summary_cache.get_or_create(
+        key, lambda: openai_complete(source_name, title, text, on_update),
+        model=settings.OPENAI_MODEL, prompt_version=PROMPT_VERSION
     )
+    return summary
+
+
+def get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.encoding_for_model(settings.OPENAI_MODEL)
+        except Exception:
+            try:
+                _encoding = tiktoken.get_encoding('cl100k_base')
+            except Exception as e:
+                logging.warning(f'tiktoken unavailable, estimating: {e}')
+                _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_tokens(text: str, max_tokens: int) -> List[str]:
+    """
+    Режет текст на куски не длиннее max_tokens токенов: по срезам
+    токенов, если есть tiktoken, иначе по оценке в символах.
+    """
+    encoding = get_encoding()
+    if encoding is None:
+        size = max_tokens * CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)]
+    tokens = encoding.encode(text, disallowed_special=())
+    # A token may end inside a multibyte character, the decoder keeps
+    # the partial bytes for the next slice
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pieces = [
+        decoder.decode(encoding.decode_bytes(tokens[i:i + max_tokens]))
+        for i in range(0, len(tokens), max_tokens)
+    ]
+    pieces[-1] += decoder.decode(b'', final=True)
+    return [piece for piece in pieces if piece]
+
+
+def split_sections(text: str, max_tokens: int) -> List[str]:
+    """
+    Делит текст на части не длиннее max_tokens токенов по границам
+    абзацев, слишком длинные абзацы - по предложениям.
+    """
+    pieces = []
+    for paragraph in PARAGRAPHS.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if count_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+            continue
+        for sentence in SENTENCES.split(paragraph):
+            if count_tokens(sentence) <= max_tokens:
+                pieces.append(sentence)
+            else:
+                pieces.extend(split_tokens(sentence, max_tokens))
+
+    sections, section, tokens = [], [], 0
+    for piece in pieces:
+        piece_tokens = count_tokens(piece)
+        if section and tokens + piece_tokens > max_tokens:
+            sections.append('\n\n'.join(section))
+            section, tokens = [], 0
+        section.append(piece)
+        tokens += piece_tokens
+    if section:
+        sections.append('\n\n'.join(section))
+    return sections
+
 
+def use_map_reduce(tokens: int) -> bool:
+    mode = settings.OPENAI_SUMMARIZE_MODE
+    if mode == 'single':
+        return False
+    if mode == 'map_reduce':
+        return tokens > settings.OPENAI_CHUNK_TOKENS
+    return tokens > settings.OPENAI_INPUT_TOKENS
+
+
+def build_prompt(source_name: str, title: str, text: str) -> str:
     prompt = f'''
             Сделай саммари текста публикации СМИ на русском языке.
             Суть саммари: передать читателю всё максимально важное из публикации в лапидарной форме, но не слишком короткой. Нужно, чтобы пост выглядел интересным для читателя, а не сухим и скучным. 
@@ -43,22 +166,110 @@ async def openai_summarize(source_name: str, title: str, text: str) -> str:
             Оригинальный заголовок: {title}
             Текст статьи: {text}
             '''
-    context = 'Ты профессиональный журналист, создающий лаконичные саммари новостей.'
+    return prompt
+
+
+def add_usage(total: Dict[str, Optional[int]],
+              usage: Dict[str, Optional[int]]) -> Dict[str, Optional[int]]:
+    return {
+        key: (total.get(key) or 0) + (value or 0)
+        for key, value in usage.items()
+    }
+
+
+async def openai_complete(source_name: str, title: str, text: str,
+                          on_update: Optional[OnUpdate] = None
+                          ) -> SummaryResult:
+    """
+    Получить краткое содержание текста с использованием OpenAI API.
+    Длинные статьи суммируются по частям (map-reduce), чтобы не
+    выходить за контекст модели и не упираться во время ответа.
+
+    :param source_name: Название СМИ.
+    :param title: Заголовок статьи.
+    :param text: Полный текст статьи.
+    :param on_update: Получает частичный текст саммари при потоковом ответе.
+    :return: Краткое содержание текста и расход токенов.
+    """
+    tokens = await asyncio.to_thread(count_tokens, text)
+    if use_map_reduce(tokens):
+        sections = await asyncio.to_thread(
+            split_sections, text, settings.OPENAI_CHUNK_TOKENS
+        )
+        logging.info(
+            f'Map-reduce summary: {tokens} tokens, {len(sections)} sections'
+        )
+        return await openai_map_reduce(
+            source_name, title, sections, on_update
+        )
+    return await openai_chat(
+        build_prompt(source_name, title, text), settings.OPENAI_MAX_TOKENS,
+        on_update
+    )
+
 
+async def openai_map_reduce(source_name: str, title: str,
+                            sections: List[str],
+                            on_update: Optional[OnUpdate] = None
+                            ) -> SummaryResult:
+    """
+    Конспектирует части параллельно, затем делает саммари по конспектам
+    основным промптом. Потоком читается только итоговое саммари.
+    """
+    semaphore = asyncio.Semaphore(settings.OPENAI_MAP_CONCURRENCY)
+
+    async def summarize_section(index: int, section: str) -> SummaryResult:
+        async with semaphore:
+            return await openai_chat(SECTION_PROMPT.format(
+                index=index, count=len(sections), title=title, text=section
+            ), settings.OPENAI_SECTION_MAX_TOKENS)
+
+    results = await asyncio.gather(*(
+        summarize_section(index, section)
+        for index, section in enumerate(sections, start=1)
+    ))
+    usage = {}
+    for _, section_usage in results:
+        usage = add_usage(usage, section_usage)
+    notes = '\n\n'.join(note for note, _ in results)
+    summary, reduce_usage = await openai_chat(
+        build_prompt(source_name, title, notes), settings.OPENAI_MAX_TOKENS,
+        on_update
+    )
+    return summary, add_usage(usage, reduce_usage)
+
+
+def get_usage(usage) -> Dict[str, Optional[int]]:
+    return {
+        'prompt_tokens': usage.prompt_tokens if usage else None,
+        'completion_tokens': usage.completion_tokens if usage else None,
+        'total_tokens': usage.total_tokens if usage else None,
+    }
+
+
+async def openai_chat(prompt: str, max_tokens: Optional[int],
+                      on_update: Optional[OnUpdate] = None
+                      ) -> SummaryResult:
+    client = http_clients.get_openai()
+    request = dict(
+        model=settings.OPENAI_MODEL,
+        max_tokens=max_tokens,
+        temperature=settings.OPENAI_TEMPERATURE,
+        messages=[
+            {'role': 'system', 'content': CONTEXT},
+            {'role': 'user', 'content': prompt}
+        ],
+    )
     try:
+        if on_update is not None:
+            with track_call('openai', 'chat.completions.stream'):
+                return await openai_stream(client, request, on_update)
         # Отправить запрос к OpenAI API
-        response = await client.chat.completions.create(
-            model=settings.OPENAI_MODEL,
-            max_tokens=settings.OPENAI_MAX_TOKENS,
-            temperature=settings.OPENAI_TEMPERATURE,
-            messages=[
-                {'role': 'system', 'content': context},
-                {'role': 'user', 'content': prompt}
-            ],
-        )
+        with track_call('openai', 'chat.completions'):
+            response = await client.chat.completions.create(**request)
         # Извлечь и вернуть результат
         summary = response.choices[0].message.content.strip()
-        return summary
+        return summary, get_usage(response.usage)
     except openai.AuthenticationError as e:
         raise HTTPException(
             status_code=401, detail=f'Ошибка аутентификации OpenAI API: {e}'
@@ -75,3 +286,21 @@ async def openai_summarize(source_name: str, title: str, text: str) -> str:
     #     raise HTTPException(
     #         status_code=500, detail=f'Неизвестная ошибка: {e}'
     #     )
+
+
+async def openai_stream(client, request: Dict,
+                        on_update: OnUpdate) -> SummaryResult:
+    """
+    Читает ответ модели потоком, передавая накопленный текст в on_update.
+    """
+    stream = await client.chat.completions.create(
+        **request, stream=True, stream_options={'include_usage': True}
+    )
+    summary, usage = '', None
+    async for chunk in stream:
+        if chunk.usage:
+            usage = chunk.usage
+        if chunk.choices and chunk.choices[0].delta.content:
+            summary += chunk.choices[0].delta.content
+            await on_update(summary)
+    return summary.strip(), get_usage(usage)
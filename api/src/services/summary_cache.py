@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import logging
+import re
+
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from core.config import settings
+from db.session import async_session
+from utils.cache import TTLCache
+
+import crud, schemas  # noqa
+
+
+WHITESPACE = re.compile(r'\s+')
+
+# Summary text and OpenAI usage (prompt/completion/total tokens)
+SummaryResult = Tuple[str, Dict[str, Optional[int]]]
+
+
+def normalize_text(text: str) -> str:
+    return WHITESPACE.sub(' ', text).strip().lower()
+
+
+def get_summary_key(text: str, source_name: str, model: str,
+                    prompt_version: str) -> str:
+    """
+    Ключ кэша саммари: sha256 от модели, версии промпта, названия СМИ
+    (оно входит в текст саммари) и нормализованного текста статьи.
+    """
+    raw = f'{model}:{prompt_version}:{source_name}:{normalize_text(text)}'
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class SummaryCache:
+    """
+    Кэш саммари: LRU в процессе поверх таблицы summary в Postgres.
+    Одновременные запросы одного и того же текста ждут один вызов
+    OpenAI (single-flight), а не делают по вызову каждый.
+    """
+
+    def __init__(self, maxsize: int = 1000):
+        self.cache = TTLCache(maxsize=maxsize)
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.tokens_saved = 0
+
+    async def lookup(self, key: str) -> Optional[SummaryResult]:
+        result = self.cache.get(key)
+        if result is not None:
+            self.memory_hits += 1
+            return result
+        try:
+            async with async_session() as db:
+                row = await crud.summary.get_by_key(db, key=key)
+        except Exception as e:
+            logging.error(f'Summary cache lookup failed: {e}')
+            return None
+        if row is None:
+            return None
+        self.db_hits += 1
+        result = (row.text, {
+            'prompt_tokens': row.prompt_tokens,
+            'completion_tokens': row.completion_tokens,
+            'total_tokens': row.total_tokens,
+        })
+        self.cache.set(key, result)
+        return result
+
+    async def store(self, key: str, result: SummaryResult, model: str,
+                    prompt_version: str) -> None:
+        self.cache.set(key, result)
+        text, usage = result
+        try:
+            async with async_session() as db:
+                await crud.summary.create_or_skip(
+                    db, obj_in=schemas.SummaryCreate(
+                        key=key, model=model, prompt_version=prompt_version,
+                        text=text, **usage
+                    )
+                )
+        except Exception as e:
+            logging.error(f'Summary cache store failed: {e}')
+
+    async def get_or_create(
+        self, key: str, create: Callable[[], Awaitable[SummaryResult]],
+        model: str, prompt_version: str
+    ) -> SummaryResult:
+        """
+        Возвращает саммари из кэша, иначе вызывает create. Пока один
+        вызов create выполняется, остальные с тем же ключом ждут его.
+        """
+        if key in self.inflight:
+            self.coalesced += 1
+            result = await asyncio.shield(self.inflight[key])
+            self.tokens_saved += result[1].get('total_tokens') or 0
+            return result
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            result = await self.lookup(key)
+            if result is None:
+                self.misses += 1
+                result = await create()
+                await self.store(key, result, model, prompt_version)
+            else:
+                self.tokens_saved += result[1].get('total_tokens') or 0
+                logging.info(f'Summary cache hit {key[:12]}, {self.stats()}')
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Retrieved here so a failure nobody waited for isn't logged
+                future.exception()
+            raise
+        finally:
+            del self.inflight[key]
+
+    def stats(self) -> dict:
+        return {
+            'memory_hits': self.memory_hits,
+            'db_hits': self.db_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'tokens_saved': self.tokens_saved,
+            'cached': len(self.cache),
+        }
+
+
+summary_cache = SummaryCache(settings.SUMMARY_CACHE_SIZE)
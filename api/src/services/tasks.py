@@ -0,0 +1,146 @@
+import html
+import logging
+
+from typing import Optional
+
+from core.config import settings
+from services.html_executor import html_executor
+from services.telegram import LiveMessage, send_message
+from services.translate import google_translate
+from services.publish import publish_to_telegraph
+from services.summarize import openai_summarize
+
+from db.session import async_session
+
+
+import crud  # noqa
+
+
+async def translate_item(item_id: int):
+    # Background task to translate and update an item.
+    logging.info(f"Запущена фоновая задача translate_item для item_id={item_id}")
+    async with async_session() as db:
+        item = await crud.item.get(db=db, id=item_id)
+        if not item:
+            return
+        if not item.title_ru:
+            item.title_ru = await google_translate(item.title)
+        if not item.html_ru:
+            item.html_ru = await google_translate(item.html)
+        if not item.text_ru:
+            item.text_ru = await html_executor.clean_html(item.html_ru)
+        if not item.telegraph_url_ru:
+            item.telegraph_url_ru = await publish_to_telegraph(
+                item.title_ru, item.html_ru, item.url
+            )
+        db.add(item)
+        await db.commit()
+        text = (f'<b>{item.title_ru}</b>\n\n'
+                f'{item.telegraph_url_ru}')
+        payload = {
+            'chat_id': item.chat_id,
+            'text': text,
+            'parse_mode': 'HTML'
+        }
+        await send_message(
+            db, payload, item_id=item.id, stage='telegram_translate'
+        )
+
+async def summarize_item(item_id: int, message_id: Optional[int] = None):
+    # Background task to summarize and update an item. The summary goes
+    # into the bot's message_id when it is given.
+    logging.info(f"Запущена фоновая задача summarize_item для item_id={item_id}")
+    async with async_session() as db:
+        item = await crud.item.get(db=db, id=item_id)
+        if not item:
+            return
+        source_name = item.source.name
+        title = item.title_ru or item.title
+        text = item.text_ru or item.text
+        if text and not item.summary_ru and settings.OPENAI_STREAM \
+                and item.chat_id is not None:
+            await stream_summary(
+                db, item, source_name, title, text, message_id
+            )
+            return
+        if text and not item.summary_ru:
+            item.summary_ru = await openai_summarize(
+                source_name, title, text
+            )
+        db.add(item)
+        await db.commit()
+        if message_id and item.chat_id is not None:
+            header = f'<b>{html.escape(title or "")}</b>\n\n'
+            live = LiveMessage(item.chat_id, header, message_id=message_id)
+            await live.finish(db, item.summary_ru)
+            return
+        text = (f'<b>{item.title_ru or item.title}</b>\n\n'
+                f'{item.summary_ru}')
+        payload = {
+            'chat_id': item.chat_id,
+            'text': text,
+            'parse_mode': 'HTML'
+        }
+        await send_message(
+            db, payload, item_id=item.id, stage='telegram_summary'
+        )
+
+
+async def stream_summary(db, item, source_name: str, title: str, text: str,
+                         message_id: Optional[int] = None):
+    # Summary shown in one message edited as tokens arrive, then saved.
+    header = f'<b>{html.escape(title or "")}</b>\n\n'
+    live = LiveMessage(item.chat_id, header, message_id=message_id)
+    await live.start('⏱️ Готовлю саммари...')
+
+    try:
+        item.summary_ru = await openai_summarize(
+            source_name, title, text, on_update=live.update
+        )
+    except Exception:
+        # The job is retried with a new placeholder, don't leave this one
+        await live.delete()
+        raise
+    db.add(item)
+    await db.commit()
+    await live.finish(db, item.summary_ru)
+
+
+async def notify_item(db, item):
+    # Queue the article post with translate/summarize buttons.
+    text = (f'<b>{item.title}</b>\n\n'
+            f'<a href="{item.telegraph_url}">'
+            f'{item.telegraph_url}'
+            '</a>')
+    keyboard = {
+        'inline_keyboard': [
+            [
+                {'text': '🇷🇺 Перевод статьи', 'callback_data': f'get_translate:{item.id}'},
+                {'text': '📝️ Саммари статьи', 'callback_data': f'get_summary:{item.id}'}
+            ]
+        ]
+    }
+    payload = {
+        'chat_id': item.chat_id,
+        'text': text,
+        'parse_mode': 'HTML',
+        'reply_markup': keyboard
+    }
+    logging.info(f"Ставлю сообщение в очередь Telegram для chat_id={item.chat_id}")
+    await send_message(db, payload, item_id=item.id, stage='telegram_post')
+
+
+async def publish_item(item_id: int):
+    # Publishes an article the crawler failed to put on Telegraph, then
+    # posts it to the chat.
+    async with async_session() as db:
+        item = await crud.item.get(db=db, id=item_id)
+        if not item:
+            return
+        if not item.telegraph_url:
+            item.telegraph_url = await publish_to_telegraph(
+                item.title, item.html, item.url
+            )
+            db.add(item)
+            await db.commit()
+        await notify_item(db, item)
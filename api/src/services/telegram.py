@@ -0,0 +1,228 @@
+import asyncio
+import html
+import logging
+import time
+
+from typing import Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.metrics import count_error, track_call
+from services.http_clients import http_clients
+from utils.cache import TTLCache
+from utils.rate_limit import TokenBucket
+
+import crud, models, schemas  # noqa
+
+
+TELEGRAM_API_URL = 'https://api.telegram.org/bot{token}/{method}'
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+async def telegram_request(method: str, payload: Dict) -> Dict:
+    """
+    Вызывает метод Bot API через общую сессию и возвращает ответ
+    Telegram. Сетевые ошибки превращаются в ответ с ok=False
+    без error_code, чтобы диспетчер мог повторить отправку.
+    """
+    url = TELEGRAM_API_URL.format(
+        token=settings.TELEGRAM_BOT_TOKEN, method=method
+    )
+    session = http_clients.get_session('telegram')
+    try:
+        with track_call('telegram', method):
+            async with session.post(url, json=payload) as response:
+                try:
+                    data = await response.json(content_type=None)
+                except ValueError:
+                    data = {
+                        'ok': False, 'error_code': response.status,
+                        'description': await response.text()
+                    }
+    except Exception as e:
+        logging.error(f"Exception while calling Telegram {method}: {e}")
+        return {'ok': False, 'description': str(e)}
+    if not data.get('ok'):
+        count_error('telegram', method, data.get('error_code'))
+    return data
+
+
+class TelegramLimits:
+    """
+    Лимиты Bot API процесса: общий token bucket бота и по одному на
+    чат (для групп и каналов, id которых отрицательные, лимит ниже).
+    Их делят диспетчер исходящей очереди и LiveMessage, который
+    отправляет правки напрямую.
+    """
+
+    def __init__(self):
+        rate = settings.TELEGRAM_GLOBAL_RATE
+        self.global_bucket = TokenBucket(rate, capacity=rate)
+        # Idle chats are dropped, a new bucket starts full anyway
+        self.chat_buckets = TTLCache(maxsize=10000, ttl=600)
+
+    def get_chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            rate = settings.TELEGRAM_GROUP_RATE if chat_id < 0 \
+                else settings.TELEGRAM_CHAT_RATE
+            bucket = TokenBucket(rate, capacity=1)
+        self.chat_buckets.set(chat_id, bucket)
+        return bucket
+
+    def delay(self, chat_id: int) -> float:
+        return max(self.get_chat_bucket(chat_id).delay(),
+                   self.global_bucket.delay())
+
+    async def acquire(self, chat_id: int) -> None:
+        await self.get_chat_bucket(chat_id).acquire()
+        await self.global_bucket.acquire()
+
+
+telegram_limits = TelegramLimits()
+
+
+async def send_message(
+    db: AsyncSession, payload: Dict, method: str = 'sendMessage',
+    item_id: Optional[int] = None, stage: Optional[str] = None
+) -> Optional[models.TelegramMessage]:
+    """
+    Ставит сообщение в исходящую очередь. Отправляет его диспетчер
+    воркера с учётом лимитов Telegram и повторами. С item_id и stage
+    время от постановки в очередь до отправки пишется как стадия статьи.
+    """
+    chat_id = payload.get('chat_id')
+    if chat_id is None:
+        logging.warning(f"Telegram {method} skipped, no chat_id")
+        return None
+    return await crud.telegram_message.create(
+        db, obj_in=schemas.TelegramMessageCreate(
+            chat_id=chat_id, method=method, payload=payload,
+            item_id=item_id, stage=stage
+        )
+    )
+
+
+class LiveMessage:
+    """
+    Сообщение, которое дописывается по мере генерации текста через
+    editMessageText. Правки не чаще TELEGRAM_EDIT_INTERVAL секунд,
+    промежуточные версии между ними пропускаются. Если отправить
+    черновик не удалось, обновления игнорируются, а итог уходит
+    обычным сообщением через очередь. Если генерация упала, черновик
+    удаляется, чтобы повтор задачи не оставлял в чате висящие
+    заглушки.
+
+    Запросы идут в обход очереди, но берут токены из telegram_limits,
+    как диспетчер: промежуточная правка пропускается, если токена нет.
+    header - готовый HTML, текст передаётся как есть, экранируется и
+    обрезается здесь. С message_id черновиком становится уже
+    отправленное сообщение (заглушка бота), новое не создаётся.
+    """
+
+    def __init__(self, chat_id: int, header: str = '',
+                 message_id: Optional[int] = None):
+        self.chat_id = chat_id
+        self.header = header
+        self.message_id = message_id
+        self.text: Optional[str] = None
+        self.next_edit = 0.0
+
+    def render(self, text: str, suffix: str = '') -> str:
+        limit = MAX_MESSAGE_LENGTH - len(self.header) - len(suffix)
+        return f'{self.header}{escape_truncated(text, limit)}{suffix}'
+
+    async def request(self, method: str, payload: Dict) -> Dict:
+        await telegram_limits.acquire(self.chat_id)
+        response = await telegram_request(method, {
+            'chat_id': self.chat_id, **payload
+        })
+        if response.get('error_code') == 429:
+            telegram_limits.get_chat_bucket(self.chat_id).block(
+                response.get('parameters', {}).get('retry_after', 1)
+            )
+        return response
+
+    async def start(self, text: str) -> bool:
+        text = self.render(text)
+        if self.message_id is not None:
+            if await self.edit(text):
+                return True
+            # Deleted or too old to edit, post a new draft
+            self.message_id = None
+        response = await self.request('sendMessage', {
+            'text': text, 'parse_mode': 'HTML'
+        })
+        if response.get('ok'):
+            self.message_id = response['result']['message_id']
+            self.text = text
+            self.next_edit = time.monotonic() + settings.TELEGRAM_EDIT_INTERVAL
+        else:
+            logging.warning(f"Live message not started: {response}")
+        return self.message_id is not None
+
+    async def edit(self, text: str) -> bool:
+        # text is rendered HTML
+        if text == self.text:
+            return True
+        response = await self.request('editMessageText', {
+            'message_id': self.message_id, 'text': text, 'parse_mode': 'HTML'
+        })
+        interval = settings.TELEGRAM_EDIT_INTERVAL
+        if response.get('ok'):
+            self.text = text
+        elif response.get('error_code') == 429:
+            interval = response.get('parameters', {}).get(
+                'retry_after', interval
+            )
+        self.next_edit = time.monotonic() + interval
+        return bool(response.get('ok'))
+
+    async def update(self, text: str, suffix: str = '▌') -> None:
+        if self.message_id is None or time.monotonic() < self.next_edit:
+            return
+        if telegram_limits.delay(self.chat_id) > 0:
+            return
+        await self.edit(self.render(text, suffix))
+
+    async def delete(self) -> None:
+        if self.message_id is None:
+            return
+        response = await self.request('deleteMessage', {
+            'message_id': self.message_id
+        })
+        if not response.get('ok'):
+            logging.warning(f"Live message not deleted: {response}")
+        self.message_id = None
+
+    async def finish(self, db: AsyncSession, text: str) -> None:
+        text = self.render(text)
+        if self.message_id is not None:
+            if time.monotonic() < self.next_edit:
+                await asyncio.sleep(self.next_edit - time.monotonic())
+            if await self.edit(text):
+                return
+            # The result goes out as a new message, drop the draft
+            await self.delete()
+        await send_message(db, {
+            'chat_id': self.chat_id, 'text': text, 'parse_mode': 'HTML'
+        })
+
+
+def escape_truncated(text: str, limit: int = MAX_MESSAGE_LENGTH) -> str:
+    """
+    Экранирует текст для parse_mode=HTML и укладывает результат в limit
+    символов. Обрезается исходный текст, а не экранированный, так что
+    сущность вроде &amp; не разрезается посередине.
+    """
+    escaped = html.escape(text)
+    if len(escaped) <= limit:
+        return escaped
+    length = 0
+    for cut, char in enumerate(text):
+        length += len(html.escape(char))
+        if length > limit - 1:
+            break
+    return html.escape(text[:cut]) + '…'
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Dict, List
+
+from core.config import settings
+from db.session import async_session
+from services.telegram import (
+    MAX_MESSAGE_LENGTH, telegram_limits, telegram_request
+)
+from services.tracing import record_stages
+
+import crud, models, schemas  # noqa
+from schemas.status import Status
+
+
+# Joins coalesced texts of one chat
+COALESCE_SEPARATOR = '\n\n'
+
+# Longer waits for a chat bucket go back to the queue instead of
+# holding up the other chats of the batch
+MAX_CHAT_WAIT = 1.0
+
+
+def _options(payload: Dict) -> Dict:
+    return {key: value for key, value in payload.items() if key != 'text'}
+
+
+def can_coalesce(first: Dict, second: Dict) -> bool:
+    """
+    Два текстовых сообщения без клавиатуры с одинаковыми параметрами
+    можно отправить одним запросом, если текст укладывается в лимит.
+    """
+    if 'reply_markup' in first or 'reply_markup' in second:
+        return False
+    if _options(first) != _options(second):
+        return False
+    length = len(first.get('text', '')) + len(second.get('text', ''))
+    return length + len(COALESCE_SEPARATOR) <= MAX_MESSAGE_LENGTH
+
+
+def coalesce(messages: List[models.TelegramMessage]) -> List[tuple]:
+    """
+    Склеивает подряд идущие сообщения одного чата.
+    Возвращает тройки (id сообщений, payload, метод) в исходном порядке.
+    """
+    batches = []
+    for message in messages:
+        if batches and message.method == 'sendMessage' and \
+                batches[-1][2] == 'sendMessage' and \
+                can_coalesce(batches[-1][1], message.payload):
+            ids, payload, method = batches[-1]
+            payload = {**payload, 'text': COALESCE_SEPARATOR.join(
+                (payload['text'], message.payload['text'])
+            )}
+            batches[-1] = (ids + [message.id], payload, method)
+        else:
+            batches.append(([message.id], message.payload, message.method))
+    return batches
+
+
+def get_delivery_timings(
+    messages: List[models.TelegramMessage]
+) -> List[schemas.StageTimingCreate]:
+    # Queue to delivery time of messages sent on behalf of an article
+    now = datetime.utcnow()
+    return [schemas.StageTimingCreate(
+        item_id=message.item_id, stage=message.stage,
+        started_at=message.created_at, finished_at=now
+    ) for message in messages if message.item_id and message.stage]
+
+
+class Dispatcher:
+    """
+    Отправляет исходящие сообщения Telegram из таблицы telegram_message.
+    Общий token bucket держит глобальный лимит бота, отдельные -
+    лимиты чатов и групп (telegram_limits, общие с LiveMessage).
+    На 429 чат ставится на паузу на retry_after, а его сообщения
+    возвращаются в очередь, порядок внутри чата сохраняется. Если
+    склеенные сообщения отклонены (4xx), они отправляются по одному,
+    чтобы одно битое сообщение не потянуло за собой остальные.
+    """
+
+    def __init__(self):
+        self.limits = telegram_limits
+        self.stopping = asyncio.Event()
+
+    async def send_chat(
+        self, chat_id: int, messages: List[models.TelegramMessage]
+    ) -> None:
+        bucket = self.limits.get_chat_bucket(chat_id)
+        attempts = {message.id: message.attempts for message in messages}
+        by_id = {message.id: message for message in messages}
+        batches = coalesce(messages)
+        for index, (ids, payload, method) in enumerate(batches):
+            rest = [i for batch in batches[index + 1:] for i in batch[0]]
+            if (wait := bucket.delay()) > MAX_CHAT_WAIT:
+                async with async_session() as db:
+                    await crud.telegram_message.postpone(
+                        db, ids=ids + rest,
+                        send_at=datetime.utcnow() + timedelta(seconds=wait)
+                    )
+                return
+            await bucket.acquire()
+            await self.limits.global_bucket.acquire()
+            response = await telegram_request(method, payload)
+            if response.get('ok'):
+                async with async_session() as db:
+                    await crud.telegram_message.set_status(
+                        db, ids=ids, status=Status.DONE
+                    )
+                await record_stages(
+                    get_delivery_timings([by_id[i] for i in ids])
+                )
+                continue
+
+            error = f"{response.get('error_code')} " \
+                    f"{response.get('description')}"
+            code = response.get('error_code')
+            if code is not None and 400 <= code < 500 and code != 429 \
+                    and len(ids) > 1:
+                # Find the bad one: send the merged messages separately
+                # next (the loop picks up the inserted batches)
+                logging.warning(
+                    f'Telegram {method} of {len(ids)} merged messages '
+                    f'rejected, sending one by one: {error}'
+                )
+                batches[index + 1:index + 1] = [
+                    ([i], by_id[i].payload, by_id[i].method) for i in ids
+                ]
+                continue
+            async with async_session() as db:
+                if code == 429:
+                    retry_after = response.get(
+                        'parameters', {}
+                    ).get('retry_after', 1)
+                    bucket.block(retry_after)
+                    logging.warning(
+                        f'Telegram rate limit for chat {chat_id}, '
+                        f'retry after {retry_after}s'
+                    )
+                    await crud.telegram_message.postpone(
+                        db, ids=ids + rest, error=error,
+                        send_at=datetime.utcnow() +
+                        timedelta(seconds=retry_after)
+                    )
+                    return
+                if code is not None and 400 <= code < 500:
+                    # Bad request, bot blocked, chat not found: no retry
+                    logging.warning(f'Telegram {method} rejected: {error}')
+                    await crud.telegram_message.set_status(
+                        db, ids=ids, status=Status.FAILED, error=error
+                    )
+                    continue
+                attempt = max(attempts[i] for i in ids)
+                if attempt >= settings.TELEGRAM_MAX_ATTEMPTS:
+                    logging.error(f'Telegram {method} gave up: {error}')
+                    await crud.telegram_message.set_status(
+                        db, ids=ids, status=Status.FAILED, error=error
+                    )
+                    continue
+                send_at = datetime.utcnow() + timedelta(
+                    seconds=settings.TELEGRAM_RETRY_BACKOFF *
+                    2 ** (attempt - 1)
+                )
+                await crud.telegram_message.set_status(
+                    db, ids=ids, status=Status.NEW, error=error,
+                    send_at=send_at
+                )
+                if rest:
+                    await crud.telegram_message.postpone(
+                        db, ids=rest, send_at=send_at
+                    )
+                return
+
+    async def poll(self) -> int:
+        async with async_session() as db:
+            messages = await crud.telegram_message.claim(
+                db, limit=settings.TELEGRAM_BATCH_SIZE,
+                lock_timeout=settings.TELEGRAM_LOCK_TIMEOUT
+            )
+        by_chat = groupby(
+            sorted(messages, key=lambda message: message.chat_id),
+            key=lambda message: message.chat_id
+        )
+        await asyncio.gather(*(
+            self.send_chat(chat_id, list(chat_messages))
+            for chat_id, chat_messages in by_chat
+        ))
+        return len(messages)
+
+    async def run(self) -> None:
+        logging.info('Telegram dispatcher started')
+        while not self.stopping.is_set():
+            try:
+                sent = await self.poll()
+            except Exception as e:
+                logging.exception(f'Telegram dispatch failed: {e}')
+                sent = 0
+            if sent:
+                continue
+            try:
+                await asyncio.wait_for(
+                    self.stopping.wait(), settings.TELEGRAM_POLL_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+        logging.info('Telegram dispatcher stopped')
+
+    def stop(self) -> None:
+        self.stopping.set()
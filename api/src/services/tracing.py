@@ -0,0 +1,62 @@
+import logging
+
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Optional
+from uuid import uuid4
+
+from db.session import async_session
+
+import crud, schemas  # noqa
+
+
+def new_trace_id() -> str:
+    return uuid4().hex
+
+
+async def record_stages(timings: List[schemas.StageTimingCreate]) -> None:
+    """
+    Записывает замеры стадий в stage_timing. Ошибка записи только
+    логируется: трассировка не должна ломать обработку статьи.
+    """
+    if not timings:
+        return
+    try:
+        async with async_session() as db:
+            await crud.stage_timing.create_many(db, objs_in=timings)
+    except Exception as e:
+        logging.error(f'Stage timings not recorded: {e}')
+
+
+async def record_stage(
+    item_id: int, stage: str, started_at: datetime,
+    finished_at: Optional[datetime] = None, trace_id: Optional[str] = None,
+    error: Optional[str] = None
+) -> None:
+    await record_stages([schemas.StageTimingCreate(
+        item_id=item_id, trace_id=trace_id, stage=stage,
+        started_at=started_at, finished_at=finished_at or datetime.utcnow(),
+        error=error
+    )])
+
+
+@asynccontextmanager
+async def trace_stage(
+    item_id: Optional[int], stage: str, trace_id: Optional[str] = None
+):
+    """
+    Замеряет блок как стадию статьи, исключение записывается в error
+    и пробрасывается дальше.
+    """
+    started_at = datetime.utcnow()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+        raise
+    finally:
+        if item_id is not None:
+            await record_stage(
+                item_id, stage, started_at, trace_id=trace_id, error=error
+            )
@@ -1,9 +1,29 @@
+import re
 import time
+import asyncio
 import logging
-from bs4 import BeautifulSoup
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
 from deep_translator import GoogleTranslator
 
 from core.config import settings
+from core.metrics import track_call
+from services.html_executor import html_executor
+from services.translation_memory import translation_memory
+from utils.html_cleaner import get_text_segments, replace_text_segments
+
+
+# Separates packed segments inside one request, Google keeps it as is
+SEGMENT_DELIMITER = '\n⁂\n'
+SEGMENT_SPLIT = re.compile(r'\s*⁂\s*')
+
+# Shared by all translations, bounds parallel requests process-wide
+executor = ThreadPoolExecutor(
+    max_workers=settings.TRANSLATE_CONCURRENCY,
+    thread_name_prefix='translate'
+)
 
 
 def split_text(text, max_length=5000):
@@ -14,36 +34,130 @@ def split_text(text, max_length=5000):
     while len(text) > max_length:
         split_index = text[:max_length].rfind('. ')
         if split_index == -1:  # Если пробел не найден, принудительно обрезаем
-            split_index = max_length
+            split_index = max_length - 1
         chunks.append(text[:split_index+1])
-        text = text[split_index-1:].lstrip()
+        text = text[split_index+1:].lstrip()
     chunks.append(text)
     return chunks
 
-def google_translate(text: str, source: str = 'auto', target: str = 'ru'):
+
+def pack_segments(segments: List[str], max_length=5000) -> List[List[str]]:
+    """
+    Группирует сегменты в пакеты, каждый из которых укладывается
+    в max_length символов вместе с разделителями.
+    """
+    batches = []
+    batch, size = [], 0
+    for segment in segments:
+        extra = len(segment) + (len(SEGMENT_DELIMITER) if batch else 0)
+        if batch and size + extra > max_length:
+            batches.append(batch)
+            batch, size = [], 0
+            extra = len(segment)
+        batch.append(segment)
+        size += extra
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def get_translator(source: str = 'auto', target: str = 'ru'):
+    return GoogleTranslator(source=source, target=target, proxies={
+        'all': settings.TRANSLATE_PROXY_URL
+    } if settings.TRANSLATE_PROXY_URL else None)
+
+
+def request_translation(translator, text: str) -> str:
+    with track_call('google_translate', 'translate'):
+        return translator.translate(text)
+
+
+def translate_batch(batch: List[str], source: str = 'auto',
+                    target: str = 'ru') -> List[Optional[str]]:
     """
-    Переводит длинный текст, разбивая его на части, если это необходимо.
+    Переводит пакет сегментов одним запросом. Если разделители
+    не пережили перевод, переводит сегменты по одному.
+    Для сегментов, перевод которых не получен, возвращает None.
+    """
+    max_length = settings.TRANSLATE_MAX_CHARS
+    translator = get_translator(source, target)
+    if len(batch) == 1:
+        chunks = [
+            request_translation(translator, chunk)
+            for chunk in split_text(batch[0], max_length)
+        ]
+        return [' '.join(chunks) if all(chunks) else None]
+    translated = request_translation(
+        translator, SEGMENT_DELIMITER.join(batch)
+    ) or ''
+    parts = SEGMENT_SPLIT.split(translated.strip())
+    if len(parts) == len(batch):
+        return parts
+    logging.warning(
+        f'Translation delimiters lost ({len(parts)} of {len(batch)}), '
+        f'retrying segment by segment'
+    )
+    return [
+        request_translation(translator, segment) or None
+        for segment in batch
+    ]
+
+
+def translate_segments(segments: List[str], source: str = 'auto',
+                       target: str = 'ru') -> List[Optional[str]]:
+    """
+    Переводит список сегментов минимальным числом запросов,
+    пакеты отправляются параллельно. None - перевод не получен.
+    """
+    batches = pack_segments(segments, settings.TRANSLATE_MAX_CHARS)
+    results = executor.map(
+        lambda batch: translate_batch(batch, source, target), batches
+    )
+    return [segment for batch in results for segment in batch]
+
+
+async def google_translate(text: str, source: str = 'auto',
+                           target: str = 'ru'):
+    """
+    Переводит HTML или текст: собирает все текстовые узлы, берёт
+    известные переводы из памяти переводов, а остальные переводит
+    пакетами, а не по одному запросу на узел.
     """
     start = time.time()
-    def translate_element(text: str, source: str = 'auto', target: str = 'ru'):
-        chunks = split_text(text)
-        translated_chunks = []
-        translator = GoogleTranslator(source=source, target=target, proxies={
-            'all': settings.TRANSLATE_PROXY_URL
-        } if settings.TRANSLATE_PROXY_URL else None)
-        for chunk in chunks:
-            translated_chunk = translator.translate(chunk) or chunk
-            translated_chunks.append(translated_chunk)
-        return ' '.join(translated_chunks)
-
-    html = BeautifulSoup(text, 'html.parser')
-
-    for element in html.find_all(string=True):
-        if element.parent.name not in ['script', 'style']:
-            original_text = str(element)
-            translated_text = translate_element(original_text)
-            element.replace_with(translated_text)
-
-    logging.info(f'{time.time() - start} sec.')
-
-    return str(html)
\ No newline at end of file
+
+    # Parsing runs in the HTML process pool, off the event loop and GIL
+    originals = await html_executor.run(get_text_segments, text)
+    segments = [original.strip() for original in originals]
+
+    translated = await translation_memory.lookup(segments, source, target)
+    # Each distinct unknown segment is translated once
+    misses = list(dict.fromkeys(
+        segment for segment, known in zip(segments, translated)
+        if known is None
+    ))
+    if misses:
+        new = await asyncio.to_thread(
+            translate_segments, misses, source, target
+        )
+        # Untranslated segments stay in the source language and are not
+        # remembered, the next translation asks Google again
+        done = [(segment, text) for segment, text in zip(misses, new) if text]
+        if done:
+            await translation_memory.store(
+                [segment for segment, _ in done],
+                [text for _, text in done], source, target
+            )
+        new = dict(zip(misses, new))
+        translated = [
+            known if known is not None else new[segment] or segment
+            for segment, known in zip(segments, translated)
+        ]
+
+    result = await html_executor.run(replace_text_segments, text, translated)
+
+    logging.info(
+        f'{time.time() - start} sec., {len(originals)} segments, '
+        f'{len(misses)} translated'
+    )
+
+    return result
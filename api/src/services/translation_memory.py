@@ -0,0 +1,88 @@
+import hashlib
+import logging
+import re
+
+from typing import List, Optional
+
+from core.config import settings
+from core.metrics import TRANSLATION_MEMORY, TRANSLATION_MEMORY_CACHED
+from db.session import async_session
+from utils.cache import TTLCache
+
+import crud, schemas  # noqa
+
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_segment(segment: str) -> str:
+    return WHITESPACE.sub(' ', segment).strip()
+
+
+def get_segment_key(segment: str, source: str, target: str) -> str:
+    """
+    Ключ памяти переводов: sha256 от языковой пары и нормализованного
+    сегмента.
+    """
+    raw = f'{source}:{target}:{normalize_segment(segment)}'
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class TranslationMemory:
+    """
+    Память переводов: LRU в процессе поверх таблицы translation в Postgres.
+    Сегменты ищутся сначала в LRU, затем одним запросом в базе.
+    Попадания и промахи считаются в метриках Prometheus процесса,
+    который переводит (воркера задач).
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.cache = TTLCache(maxsize=maxsize)
+        TRANSLATION_MEMORY_CACHED.set_function(lambda: len(self.cache))
+
+    async def lookup(self, segments: List[str], source: str = 'auto',
+                     target: str = 'ru') -> List[Optional[str]]:
+        keys = [get_segment_key(s, source, target) for s in segments]
+        results = [self.cache.get(key) for key in keys]
+        missing = {key for key, text in zip(keys, results) if text is None}
+        TRANSLATION_MEMORY.labels('memory_hit').inc(
+            sum(1 for text in results if text is not None)
+        )
+        found = {}
+        if missing:
+            try:
+                async with async_session() as db:
+                    found = await crud.translation.get_texts_by_keys(
+                        db, keys=list(missing)
+                    )
+            except Exception as e:
+                logging.error(f'Translation memory lookup failed: {e}')
+            for key, text in found.items():
+                self.cache.set(key, text)
+        for i, key in enumerate(keys):
+            if results[i] is not None:
+                continue
+            results[i] = found.get(key)
+            TRANSLATION_MEMORY.labels(
+                'miss' if results[i] is None else 'db_hit'
+            ).inc()
+        return results
+
+    async def store(self, segments: List[str], translations: List[str],
+                    source: str = 'auto', target: str = 'ru') -> None:
+        objs_in = []
+        for segment, text in zip(segments, translations):
+            key = get_segment_key(segment, source, target)
+            self.cache.set(key, text)
+            objs_in.append(schemas.TranslationCreate(
+                key=key, source=source, target=target,
+                source_text=segment, text=text
+            ))
+        try:
+            async with async_session() as db:
+                await crud.translation.create_many(db, objs_in=objs_in)
+        except Exception as e:
+            logging.error(f'Translation memory store failed: {e}')
+
+
+translation_memory = TranslationMemory(settings.TRANSLATION_MEMORY_SIZE)
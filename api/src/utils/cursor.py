@@ -0,0 +1,38 @@
+import base64
+import binascii
+
+import orjson
+
+
+class InvalidCursorError(Exception):
+    """
+    Cursor is not something we have issued, can't decode it :(
+    """
+    pass
+
+
+def encode_cursor(values):
+    """
+    Pack the keyset values of the last row into an opaque url-safe token
+    @param values: list of column values, e.g. [created_at, id]
+    """
+    raw = orjson.dumps(list(values))
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor):
+    """
+    Unpack a token produced by encode_cursor. An empty cursor means
+    "first page" and decodes to an empty list.
+    @param cursor: token from the previous page `next_cursor`
+    """
+    if not cursor:
+        return []
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = orjson.loads(raw)
+    except (binascii.Error, ValueError):
+        raise InvalidCursorError
+    if not isinstance(values, list):
+        raise InvalidCursorError
+    return values
@@ -24,3 +24,45 @@ def clean_html(html_content, allowed_tags=None, tag_replacements=None):
 
     # Возвращаем очищенный текст
     return str(soup)
+
+
+def collect_segments(text):
+    """
+    Разбирает HTML и возвращает дерево, текстовые узлы и их исходный текст.
+    """
+    html = BeautifulSoup(text, 'html.parser')
+    elements = [
+        element for element in html.find_all(string=True)
+        if element.parent.name not in ['script', 'style']
+        and element.strip()
+    ]
+    return html, elements, [str(element) for element in elements]
+
+
+def replace_segments(html, elements, originals, translated):
+    """
+    Подставляет переводы в узлы, сохраняя пробелы вокруг текста,
+    которые Google отбрасывает.
+    """
+    for element, original, translated_text in zip(
+        elements, originals, translated
+    ):
+        leading = original[:len(original) - len(original.lstrip())]
+        trailing = original[len(original.rstrip()):]
+        element.replace_with(f'{leading}{translated_text}{trailing}')
+    return str(html)
+
+
+# Дерево BeautifulSoup не передать в другой процесс, поэтому для пула
+# процессов разбор идёт дважды: сначала за текстом узлов, потом для
+# подстановки перевода. Порядок узлов при повторном разборе тот же.
+
+def get_text_segments(text):
+    # Исходный текст узлов HTML в порядке документа
+    return collect_segments(text)[2]
+
+
+def replace_text_segments(text, translated):
+    # HTML с переводами узлов, translated в порядке get_text_segments
+    html, elements, originals = collect_segments(text)
+    return replace_segments(html, elements, originals, translated)
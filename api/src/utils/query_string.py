@@ -1,5 +1,7 @@
 import urllib.parse as urllib
 
+from functools import lru_cache
+
 unicode = str
 DEFAULT_ENCODING = None
 
@@ -181,3 +183,100 @@ def _normalize(d):
         else:
             newd[k] = v
     return newd
+
+
+def _split_key(key):
+    """
+    Tokenize `var[0]['key']` into ('var', 0, 'key') in one pass
+    @param key: unquoted variable name
+    """
+    start = key.find("[")
+    if start == -1:
+        return (int(key) if is_number(key) else key,)
+    if not key.endswith("]"):
+        raise MalformedQueryStringError
+    path = [key[:start]] if start > 0 else []
+    for part in key[start + 1:-1].split("]["):
+        if "[" in part or "]" in part:
+            raise MalformedQueryStringError
+        if len(part) > 1 and part[0] == "'" and part[-1] == "'":
+            part = part[1:-1]
+        path.append(int(part) if is_number(part) else part)
+    return tuple(path)
+
+
+def _convert_value(val):
+    if val.lower() in ('null', 'none'):
+        return None
+    return int(val) if is_number(val) else val
+
+
+@lru_cache(maxsize=1024)
+def _tokenize(query_string):
+    """
+    Flat ((path), value) pairs of a raw query string, memoized per string.
+    Tuples only, so the cached result can't be mutated by callers.
+    """
+    tokens = []
+    for element in query_string.split("&"):
+        var, sep, val = element.partition("=")
+        if not sep or "=" in val:
+            raise MalformedQueryStringError
+        tokens.append((
+            _split_key(urllib.unquote_plus(var)),
+            _convert_value(urllib.unquote_plus(val))
+        ))
+    return tuple(tokens)
+
+
+def _to_lists(d):
+    """
+    Same as _normalize for a freshly built tree: dicts keyed by indexes
+    become lists in order of appearance, `var[]` keys unwrap to the value
+    """
+    if not isinstance(d, dict) or not d:
+        return d
+    first_key = next(iter(d))
+    if isinstance(first_key, int):
+        return [_to_lists(v) for v in d.values()]
+    if first_key == '':
+        return d['']
+    for k, v in d.items():
+        if isinstance(v, dict):
+            d[k] = _to_lists(v)
+    return d
+
+
+def fast_parse(query_string, normalized=False):
+    """
+    Single-pass equivalent of parse(query_string) for url-encoded strings,
+    with the tokenization cached per raw query string
+    @param query_string: raw (still quoted) query string
+    @param normalized: parse number key in dict to proper list ?
+    """
+    if isinstance(query_string, bytes):
+        query_string = query_string.decode()
+    if query_string == "":
+        return {}
+
+    mydict = {}
+    for path, val in _tokenize(query_string):
+        node = mydict
+        for k in path[:-1]:
+            child = node.get(k)
+            if not isinstance(child, dict):
+                child = node[k] = {}
+            node = child
+        k = path[-1]
+        if k not in node:
+            node[k] = val
+        elif isinstance(node[k], list):
+            node[k].append(val)
+        else:
+            node[k] = [node[k], val]
+
+    if normalized:
+        for k, v in mydict.items():
+            if isinstance(v, dict):
+                mydict[k] = _to_lists(v)
+    return mydict
@@ -0,0 +1,51 @@
+from typing import Dict, Optional, Type
+
+from pydantic import BaseModel
+from sqlalchemy import inspect
+
+
+class ModelSerializer:
+    """
+    Turns ORM rows into plain dicts ready for orjson, with the field list
+    precomputed once from a pydantic schema. Skips jsonable_encoder and
+    response_model revalidation: values are read straight from the
+    instance state, so deferred (not loaded) columns are never touched.
+    @param model: SQLAlchemy model class
+    @param schema: pydantic schema whose fields are exposed
+    @param relations: nested serializers for relationship fields
+    @param exclude_unset: leave out fields that were not loaded instead of
+    filling in the schema defaults
+    """
+
+    def __init__(
+        self, model, schema: Type[BaseModel],
+        relations: Optional[Dict[str, 'ModelSerializer']] = None,
+        exclude_unset: bool = False
+    ):
+        columns = set(inspect(model).column_attrs.keys())
+        self.fields = tuple(
+            name for name in schema.model_fields if name in columns
+        )
+        self.relations = relations or {}
+        self.defaults = () if exclude_unset else tuple(
+            (name, field.get_default())
+            for name, field in schema.model_fields.items()
+            if not field.is_required()
+        )
+
+    def to_dict(self, obj) -> Dict:
+        state = obj.__dict__
+        row = {name: state[name] for name in self.fields if name in state}
+        for name, serializer in self.relations.items():
+            if name in state:
+                value = state[name]
+                row[name] = (
+                    serializer.to_dict(value) if value is not None else None
+                )
+        for name, default in self.defaults:
+            row.setdefault(name, default)
+        return row
+
+    def to_list(self, rows) -> list:
+        to_dict = self.to_dict
+        return [to_dict(obj) for obj in rows]
@@ -0,0 +1,44 @@
+import asyncio
+import signal
+
+from prometheus_client import start_http_server
+
+from core.logger import LOGGING   # noqa
+from core.config import settings
+from core.metrics import monitor_event_loop
+
+from db.init_db import init_db
+from services.html_executor import html_executor
+from services.http_clients import http_clients
+from services.job_queue import Worker
+from services.telegram_dispatcher import Dispatcher
+
+
+async def main() -> None:
+    await init_db()
+    if settings.METRICS_WORKER_PORT:
+        # External calls and jobs run here, not in the API process
+        start_http_server(settings.METRICS_WORKER_PORT)
+    worker = Worker()
+    dispatcher = Dispatcher()
+
+    def stop():
+        worker.stop()
+        dispatcher.stop()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop)
+    monitor = asyncio.create_task(
+        monitor_event_loop(settings.METRICS_LOOP_LAG_INTERVAL)
+    )
+    try:
+        await asyncio.gather(worker.run(), dispatcher.run())
+    finally:
+        monitor.cancel()
+        await http_clients.close()
+        html_executor.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import models  # noqa: E402
+from crud.filters import compile_filters  # noqa: E402
+from utils.query_string import fast_parse  # noqa: E402
+
+
+def parse_filters(query):
+    return fast_parse(query, normalized=True)['filters']
+
+
+def test_eq_null_matches_null_rows():
+    filters = parse_filters(
+        'filters[0][field]=title&filters[0][operator]=eq'
+        '&filters[0][value]=null'
+    )
+    clauses, params = compile_filters(models.Item, filters)
+    assert [str(clause) for clause in clauses] == ['item.title IS NULL']
+    assert params == {}
+
+
+def test_neq_none_matches_not_null_rows():
+    filters = parse_filters(
+        'filters[0][field]=title&filters[0][operator]=neq'
+        '&filters[0][value]=none'
+    )
+    clauses, params = compile_filters(models.Item, filters)
+    assert [str(clause) for clause in clauses] == ['item.title IS NOT NULL']
+
+
+def test_null_and_value_shapes_are_cached_apart():
+    null, _ = compile_filters(models.Item, parse_filters(
+        'filters[0][field]=title&filters[0][operator]=eq'
+        '&filters[0][value]=null'
+    ))
+    value, params = compile_filters(models.Item, parse_filters(
+        'filters[0][field]=title&filters[0][operator]=eq'
+        '&filters[0][value]=news'
+    ))
+    assert str(null[0]) == 'item.title IS NULL'
+    assert str(value[0]) == 'item.title = :filter_0'
+    assert params == {'filter_0': 'news'}
@@ -217,7 +217,9 @@ async def handle_message(message: types.Message):
                 session,
                 f'{FASTAPI_URL}/scrapyd/schedule/',
                 method='POST',
-                params={'chat_id': message.chat.id, 'url': url}
+                params={'chat_id': message.chat.id, 'url': url,
+                        # начало трассировки статьи в API
+                        'sent_at': int(message.date.timestamp())}
             )
             await message.answer(
                 '⏱️ Подождите, запрос обрабатывается...',
@@ -246,13 +248,19 @@ async def callback_query_handler(call: types.CallbackQuery):
                 )
                 message = '⏱️ Подождите, запрос обрабатывается...'
             elif action == 'get_summary':
+                # Саммари дописывается в это же сообщение, второго не будет
+                sent = await call.message.answer(
+                    '⏱️ Подождите, запрос обрабатывается...',
+                    parse_mode=ParseMode.HTML
+                )
                 logger.info(f"Отправляю запрос к {FASTAPI_URL}/items/{id_}/summarize")
                 await make_api_request(
                     session,
                     f'{FASTAPI_URL}/items/{id_}/summarize',
-                    method='GET'
+                    method='GET',
+                    params={'message_id': sent.message_id}
                 )
-                message = '⏱️ Подождите, запрос обрабатывается...'
+                return
             else:
                 message = '⚠️ Неизвестное действие'
             
@@ -0,0 +1,93 @@
+# scrapy/newshub/extensions.py
+
+import logging
+
+from prometheus_client import REGISTRY, start_http_server
+from prometheus_client.core import GaugeMetricFamily
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+
+logger = logging.getLogger(__name__)
+
+# Порт HTTP-сервера метрик процесса, один на процесс
+_server_port = None
+
+
+class ScrapyStatsCollector:
+    """
+    Отдаёт числовые значения статистики Scrapy (crawler.stats) всех
+    открытых пауков процесса как gauge scrapy_stats{spider, stat},
+    значения читаются в момент опроса. Семейство scrapy_stats одно на
+    реестр, поэтому и коллектор один на процесс.
+    """
+
+    def __init__(self):
+        self.crawlers = []
+
+    def collect(self):
+        family = GaugeMetricFamily(
+            'scrapy_stats', 'Scrapy stats of running spiders',
+            labels=['spider', 'stat']
+        )
+        for crawler in list(self.crawlers):
+            spider = getattr(crawler.spider, 'name', '')
+            for name, value in crawler.stats.get_stats().items():
+                if isinstance(value, (int, float)) and \
+                        not isinstance(value, bool):
+                    family.add_metric([spider, name], value)
+        yield family
+
+
+_collector = ScrapyStatsCollector()
+REGISTRY.register(_collector)
+
+
+class PrometheusExporter:
+    """
+    Экспортер метрик Prometheus для пауков. Scrapyd запускает по
+    процессу на задачу, поэтому, как и telnet-консоль, сервер занимает
+    первый свободный порт из PROMETHEUS_PORT. В воркере краулера все
+    пауки одного процесса видны на одном порту.
+    """
+
+    def __init__(self, crawler, ports, host):
+        self.crawler = crawler
+        self.ports = ports
+        self.host = host
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('PROMETHEUS_ENABLED'):
+            raise NotConfigured
+        ext = cls(
+            crawler,
+            crawler.settings.getlist('PROMETHEUS_PORT', [9410, 9450]),
+            crawler.settings.get('PROMETHEUS_HOST', '0.0.0.0')
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def start_server(self):
+        global _server_port
+        if _server_port is not None:
+            return
+        first, last = int(self.ports[0]), int(self.ports[-1])
+        for port in range(first, last + 1):
+            try:
+                start_http_server(port, addr=self.host)
+            except OSError:
+                continue
+            _server_port = port
+            logger.info(f'Prometheus metrics on port {port}')
+            return
+        logger.error(f'No free port for Prometheus metrics in {first}-{last}')
+
+    def spider_opened(self, spider):
+        self.start_server()
+        _collector.crawlers.append(self.crawler)
+
+    def spider_closed(self, spider):
+        if self.crawler in _collector.crawlers:
+            _collector.crawlers.remove(self.crawler)
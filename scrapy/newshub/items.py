@@ -18,6 +18,9 @@ class NewsItem(scrapy.Item):
     # URL статьи
     url = scrapy.Field()
 
+    # URL, с которым статья поставлена в очередь (до редиректов)
+    request_url = scrapy.Field()
+
     # Заголовок статьи
     title = scrapy.Field()
 
@@ -35,3 +38,9 @@ class NewsItem(scrapy.Item):
 
     # ID задания парсинга (Scrapy Job ID)
     job_id = scrapy.Field()
+
+    # ID трассировки, создаётся API при постановке статьи в очередь
+    trace_id = scrapy.Field()
+
+    # Замеры стадий: (стадия, начало, конец, ошибка)
+    stages = scrapy.Field()
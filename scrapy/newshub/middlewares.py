@@ -3,11 +3,15 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import time
+
 from scrapy import signals
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
 
+from .utils.tracing import add_stage
+
 
 class NewshubSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -101,3 +105,43 @@ class NewshubDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class TraceSpiderMiddleware:
+    """
+    Замеряет загрузку и разбор страницы для каждой статьи и переносит
+    trace_id из meta запроса (его ставит воркер краулера) в item.
+    Запоминает исходный URL стартового запроса: после редиректа
+    response.url другой, а строка статьи в базе создана по исходному.
+    """
+
+    def process_start_requests(self, start_requests, spider):
+        for request in start_requests:
+            request.meta.setdefault('request_url', request.url)
+            yield request
+
+    def process_spider_input(self, response, spider):
+        response.meta['parse_started'] = time.time()
+        return None
+
+    def trace(self, response, result):
+        if not is_item(result):
+            return result
+        parsed = response.meta['parse_started']
+        latency = response.meta.get('download_latency')
+        if latency is not None:
+            add_stage(result, 'download', parsed - latency, parsed)
+        add_stage(result, 'parse', parsed)
+        if response.meta.get('trace_id') and not result.get('trace_id'):
+            result['trace_id'] = response.meta['trace_id']
+        if response.meta.get('request_url') and not result.get('request_url'):
+            result['request_url'] = response.meta['request_url']
+        return result
+
+    def process_spider_output(self, response, result, spider):
+        for i in result:
+            yield self.trace(response, i)
+
+    async def process_spider_output_async(self, response, result, spider):
+        async for i in result:
+            yield self.trace(response, i)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import create_engine, Column, ForeignKey, String, Text, Integer, DateTime, Enum
+from sqlalchemy import create_engine, Column, ForeignKey, String, Text, Integer, Float, DateTime, Enum
 from sqlalchemy.orm import declarative_base, relationship
 
 from enum import Enum as PyEnum
@@ -28,6 +28,7 @@ class Item(Base):
     id = Column(Integer, primary_key=True, index=True)
     source_id = Column(Integer, ForeignKey('source.id'))
     job_id = Column(String, nullable=True)
+    trace_id = Column(String(32), nullable=True, index=True)
     url = Column(String, unique=True, nullable=False)
     title = Column(String, nullable=True)
     title_ru = Column(String, nullable=True)
@@ -42,9 +43,24 @@ class Item(Base):
     date = Column(DateTime)
     tags = Column(String, nullable=True)
     status = Column(Enum(Status), default=Status.NEW)
+    # Crawl worker lease: claim time and number of claims
+    locked_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     source = relationship('Source', lazy='joined')
 
+class StageTiming(Base):
+    __tablename__ = 'stage_timing'
+
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(Integer, ForeignKey('item.id', ondelete='CASCADE'), index=True)
+    trace_id = Column(String(32), nullable=True, index=True)
+    stage = Column(String(32), nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=False)
+    duration = Column(Float, nullable=False)
+    error = Column(Text, nullable=True)
+
 # Функция для создания таблиц, если их нет
 def create_tables(engine):
     Base.metadata.create_all(engine)
\ No newline at end of file
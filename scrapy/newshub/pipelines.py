@@ -1,14 +1,22 @@
 # scrapy/newshub/pipelines.py
 
+import asyncio
+import time
+from uuid import uuid4
+
+import aiohttp
 from itemadapter import ItemAdapter
 import lxml.html
-import requests
 from deep_translator import GoogleTranslator
-from telegraph import Telegraph
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import func
+from sqlalchemy.engine import make_url
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import create_async_engine
 from scrapy.exceptions import DropItem
-from .models import Item, create_tables
+from scrapy.utils.defer import deferred_from_coro
+from .models import Base, Item, StageTiming, Status
+from .utils.telegraph import TelegraphPublisher, build_content
+from .utils.tracing import add_stage, stage_rows
 
 
 class TranslationPipeline:
@@ -30,76 +38,256 @@ class TranslationPipeline:
 
 
 class TelegraphPipeline:
+    # A failed publication is left to the API: the webhook queues a
+    # publish job for items without telegraph_url
     def __init__(self, telegraph_token):
-        self.telegraph = Telegraph(telegraph_token)
+        self.telegraph = TelegraphPublisher(telegraph_token)
 
     @classmethod
     def from_crawler(cls, crawler):
         return cls(crawler.settings.get('TELEGRAPH_TOKEN'))
 
-    def process_item(self, item, spider):
+    def close_spider(self, spider):
+        return deferred_from_coro(self.telegraph.close())
+
+    async def process_item(self, item, spider):
+        started = time.time()
+        error = None
         try:
-            html = f"{item['html']}<p>Источник: <a href=\"{item['url']}\">{item['url']}</a></p>"
-            resp = self.telegraph.create_page(title=item['title'], html_content=html)
-            item['telegraph_url'] = "https://telegra.ph/" + resp['path']
+            page = await self.telegraph.create_page(
+                title=item['title'],
+                content=build_content(item['html'], item['url'])
+            )
+            item['telegraph_url'] = "https://telegra.ph/" + page['path']
             spider.logger.info(f"Publish Telegraph successful: {item['telegraph_url']}")
         except Exception as e:
-            spider.logger.error(f"Error publish to Telegraph: {e}")
-            raise DropItem(f"Error publish to Telegraph: {item['title']}")
+            spider.logger.error(f"Error publish to Telegraph, left to the API: {e}")
+            spider.crawler.stats.inc_value('telegraph/errors')
+            error = str(e)
+        add_stage(item, 'telegraph', started, error=error)
         return item
 
 
+def async_url(db_url):
+    # Same database through asyncpg, so queries don't block the reactor
+    return make_url(db_url).set(drivername='postgresql+asyncpg')
+
+
 class DatabasePipeline:
-    def __init__(self, db_url):
-        self.engine = create_engine(db_url)
-        create_tables(self.engine)
-        self.Session = sessionmaker(bind=self.engine)
+    """
+    Сохраняет статьи пачками через asyncpg: элементы копятся в буфере
+    и записываются одним INSERT ... ON CONFLICT (url) DO UPDATE RETURNING
+    по достижении batch_size или через batch_timeout секунд после первого
+    элемента пачки. process_item ждёт запись своей пачки и получает id
+    и trace_id для WebhookPipeline и TracePipeline. Статья без строки
+    в базе создаётся, а не теряется.
+    """
+
+    def __init__(self, db_url, pool_size=5, batch_size=50, batch_timeout=1.0):
+        self.engine = create_async_engine(
+            async_url(db_url), pool_size=pool_size, max_overflow=0,
+            pool_pre_ping=True
+        )
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.semaphore = None
+        self.buffer = []
+        self.timer = None
+        self.flushes = set()
 
     @classmethod
     def from_crawler(cls, crawler):
-        return cls(crawler.settings.get('DATABASE_URL'))
+        return cls(
+            crawler.settings.get('DATABASE_URL'),
+            crawler.settings.getint('DATABASE_POOL_SIZE', 5),
+            crawler.settings.getint('DATABASE_BATCH_SIZE', 50),
+            crawler.settings.getfloat('DATABASE_BATCH_TIMEOUT', 1.0)
+        )
+
+    async def create_tables(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
 
     def open_spider(self, spider):
-        self.session = self.Session()
+        self.semaphore = asyncio.Semaphore(self.pool_size)
+        return deferred_from_coro(self.create_tables())
+
+    async def close(self):
+        self.start_flush()
+        if self.flushes:
+            await asyncio.gather(*self.flushes, return_exceptions=True)
+        await self.engine.dispose()
 
     def close_spider(self, spider):
-        self.session.close()
+        return deferred_from_coro(self.close())
 
-    def process_item(self, item, spider):
+    def start_flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.buffer = self.buffer, []
+        if not batch:
+            return
+        task = asyncio.ensure_future(self.flush(batch))
+        self.flushes.add(task)
+        task.add_done_callback(self.flushes.discard)
+
+    async def flush(self, batch):
+        # Last version of a URL wins, a row can't be upserted twice
+        rows = {values['url']: values for values, _ in batch}
+        statement = pg_insert(Item.__table__).values(list(rows.values()))
+        statement = (statement.
+                     on_conflict_do_update(
+                         index_elements=['url'],
+                         set_={
+                             **{
+                                 column: statement.excluded[column]
+                                 for column in ('job_id', 'title', 'text',
+                                                'html', 'tags', 'status',
+                                                'locked_at')
+                             },
+                             # A failed publication keeps the earlier page
+                             'telegraph_url': func.coalesce(
+                                 statement.excluded.telegraph_url,
+                                 Item.__table__.c.telegraph_url
+                             ),
+                         }).
+                     returning(Item.__table__.c.id, Item.__table__.c.url,
+                               Item.__table__.c.trace_id))
+        try:
+            async with self.semaphore:
+                async with self.engine.begin() as conn:
+                    ids = dict(
+                        (url, (id_, trace_id))
+                        for id_, url, trace_id in await conn.execute(statement)
+                    )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for values, future in batch:
+            if not future.done():
+                future.set_result(ids.get(values['url'], (None, None)))
+
+    async def process_item(self, item, spider):
         if not all([item.get('url'), item.get('job_id'), item.get('title'),
                     item.get('text'), item.get('html')]):
             raise DropItem(f"Missing required fields in {item}")
 
-        db_item = self.session.query(Item).filter_by(url=item['url']).first()
-        if db_item:
-            item['id'] = db_item.id
-            db_item.job_id         = item['job_id']
-            db_item.title          = item['title']
-            db_item.text           = item['text']
-            db_item.html           = item['html']
-            db_item.telegraph_url  = item.get('telegraph_url')
-            db_item.tags           = item.get('tags')
-            db_item.status         = 'DONE'
-            self.session.add(db_item)
-            self.session.commit()
-        else:
-            spider.logger.warning(f"Item with url '{item['url']}' not found in the database.")
+        started = time.time()
+        future = asyncio.get_running_loop().create_future()
+        self.buffer.append(({
+            # The row the API scheduled, even if the page redirected
+            'url': item.get('request_url') or item['url'],
+            'job_id': item['job_id'],
+            # Kept on conflict: articles scheduled by the API have one
+            'trace_id': item.get('trace_id') or uuid4().hex,
+            'title': item['title'],
+            'text': item['text'],
+            'html': item['html'],
+            'telegraph_url': item.get('telegraph_url'),
+            'tags': item.get('tags'),
+            'status': Status.DONE,
+            'locked_at': None,
+        }, future))
+        if len(self.buffer) >= self.batch_size:
+            self.start_flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(
+                self.batch_timeout, self.start_flush
+            )
+        item['id'], item['trace_id'] = await future
+        add_stage(item, 'database', started)
         return item
 
 
 class WebhookPipeline:
-    def __init__(self):
+    def __init__(self, webhook_url, concurrency=8, timeout=5):
+        self.webhook_url = webhook_url
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session = None
+        self.semaphore = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
         # поправили URL: нужно именно /api/v1/scrapyd/webhook/{item_id}
-        self.webhook_url = 'http://api:8000/api/v1/scrapyd/webhook/'
+        return cls(
+            crawler.settings.get(
+                'WEBHOOK_URL', 'http://api:8000/api/v1/scrapyd/webhook/'
+            ),
+            crawler.settings.getint('WEBHOOK_CONCURRENCY', 8)
+        )
 
-    def process_item(self, item, spider):
+    def open_spider(self, spider):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+
+    def close_spider(self, spider):
+        return deferred_from_coro(self.session.close())
+
+    async def process_item(self, item, spider):
         if not item.get('id'):
             spider.logger.error(f"Webhook skipped, no ID in item {item!r}")
             return item
+        url = f'{self.webhook_url}{item["id"]}'
+        started = time.time()
+        error = None
         try:
-            resp = requests.get(f'{self.webhook_url}{item["id"]}', timeout=5)
-            resp.raise_for_status()
-            spider.logger.info(f"Webhook OK: GET {self.webhook_url}{item['id']}")
+            async with self.semaphore:
+                async with self.session.get(url) as resp:
+                    resp.raise_for_status()
+            spider.logger.info(f"Webhook OK: GET {url}")
         except Exception as e:
             spider.logger.error(f"Webhook Error: {e}")
+            error = str(e)
+        add_stage(item, 'webhook', started, error=error)
+        return item
+
+
+class TracePipeline:
+    """
+    Последний в цепочке: пишет замеры стадий статьи (загрузка, разбор,
+    Telegraph, база, webhook) в stage_timing и суммирует их в статистике
+    Scrapy (stages/<стадия>/...) для экспортера метрик. Ошибка записи
+    только логируется.
+    """
+
+    def __init__(self, db_url, stats):
+        self.stats = stats
+        self.engine = create_async_engine(
+            async_url(db_url), pool_size=1, max_overflow=1,
+            pool_pre_ping=True
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings.get('DATABASE_URL'), crawler.stats)
+
+    def close_spider(self, spider):
+        return deferred_from_coro(self.engine.dispose())
+
+    def count_stages(self, item):
+        for stage, started, finished, error in item.get('stages') or []:
+            self.stats.inc_value(f'stages/{stage}/count')
+            self.stats.inc_value(f'stages/{stage}/seconds', finished - started)
+            self.stats.max_value(f'stages/{stage}/max_seconds', finished - started)
+            if error:
+                self.stats.inc_value(f'stages/{stage}/errors')
+
+    async def process_item(self, item, spider):
+        self.count_stages(item)
+        if not item.get('id') or not item.get('stages'):
+            return item
+        try:
+            async with self.engine.begin() as conn:
+                await conn.execute(
+                    pg_insert(StageTiming.__table__).values(stage_rows(item))
+                )
+        except Exception as e:
+            spider.logger.error(f"Stage timings not recorded: {e}")
         return item
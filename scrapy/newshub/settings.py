@@ -67,9 +67,10 @@ DEFAULT_REQUEST_HEADERS = {
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-#SPIDER_MIDDLEWARES = {
+SPIDER_MIDDLEWARES = {
 #    "newshub.middlewares.NewshubSpiderMiddleware": 543,
-#}
+    "newshub.middlewares.TraceSpiderMiddleware": 100,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
@@ -79,14 +80,28 @@ DEFAULT_REQUEST_HEADERS = {
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
+EXTENSIONS = {
 #    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+    "newshub.extensions.PrometheusExporter": 500,
+}
+
+# Экспорт статистики Scrapy в Prometheus, первый свободный порт диапазона
+PROMETHEUS_ENABLED = os.getenv("PROMETHEUS_ENABLED", "1") == "1"
+PROMETHEUS_PORT = [9410, 9450]
+
+# Воркер краулера: опрос очереди, аренда статьи и число попыток,
+# сколько запросов держать в движке
+CRAWL_POLL_INTERVAL = float(os.getenv("CRAWL_POLL_INTERVAL", "1"))
+CRAWL_BATCH_SIZE = int(os.getenv("CRAWL_BATCH_SIZE", "20"))
+CRAWL_MAX_PENDING = int(os.getenv("CRAWL_MAX_PENDING", "50"))
+CRAWL_LOCK_TIMEOUT = int(os.getenv("CRAWL_LOCK_TIMEOUT", "600"))
+CRAWL_MAX_ATTEMPTS = int(os.getenv("CRAWL_MAX_ATTEMPTS", "3"))
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 ITEM_PIPELINES = {
    #"newshub.pipelines.NewshubPipeline": 300,
+    "newshub.pipelines.TracePipeline": 800,
     "newshub.pipelines.WebhookPipeline": 700,
     "newshub.pipelines.DatabasePipeline": 500,
     "newshub.pipelines.TelegraphPipeline": 300
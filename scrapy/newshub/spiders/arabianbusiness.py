@@ -4,6 +4,7 @@ from scrapy import Spider, Request
 
 from ..items import NewsItem
 from ..utils.html_cleaner import clean_html
+from ..utils.urls import split_urls
 
 
 class ArabianBusinessSpider(Spider):
@@ -14,9 +15,9 @@ class ArabianBusinessSpider(Spider):
         "ROBOTSTXT_OBEY": False,
     }
 
-    def __init__(self, url: str = None, _job: str = None, *args, **kwargs):
+    def __init__(self, url: str = None, urls: str = None, _job: str = None, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.start_urls = [url] if url else []
+        self.start_urls = split_urls(url, urls)
         self._job = _job
         self.ua = UserAgent()
 
@@ -63,7 +64,7 @@ class ArabianBusinessSpider(Spider):
         item["text"] = clean_html(cleaned_html)
 
         # 4) job_id для пайплайнов
-        item["job_id"] = self._job
+        item["job_id"] = response.meta.get('job_id') or getattr(self, '_job', None)
 
         yield item
 
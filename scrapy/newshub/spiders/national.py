@@ -8,6 +8,7 @@ from scrapy.crawler import CrawlerProcess
 
 from ..items import NewsItem
 from ..utils.html_cleaner import clean_html
+from ..utils.urls import split_urls
 
 from ..settings import OPENAI_MAX_TOKENS
 
@@ -17,9 +18,9 @@ class NationalSpider(Spider):
     allowed_domains = ["thenationalnews.com"]
     ua = UserAgent()
 
-    def __init__(self, url: str = None, *args, **kwargs):
+    def __init__(self, url: str = None, urls: str = None, *args, **kwargs):
         super(NationalSpider, self).__init__(*args, **kwargs)
-        self.start_urls = [url] if url else []
+        self.start_urls = split_urls(url, urls)
 
     def start_requests(self):
         for url in self.start_urls:
@@ -48,7 +49,7 @@ class NationalSpider(Spider):
     def parse(self, response):
         item = NewsItem()
         item['url'] = response.url
-        item['job_id'] = self._job
+        item['job_id'] = response.meta.get('job_id') or getattr(self, '_job', None)
 
         # Получаем заголовок статьи
         item['title'] = response.xpath('//h1/text()').get()
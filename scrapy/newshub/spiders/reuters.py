@@ -5,6 +5,7 @@ from scrapy.crawler import CrawlerProcess
 
 from ..items import NewsItem
 from ..utils.html_cleaner import clean_html
+from ..utils.urls import split_urls
 
 
 class ReutersSpider(Spider):
@@ -12,9 +13,9 @@ class ReutersSpider(Spider):
     allowed_domains = ["reuters.com"]
     ua = UserAgent()
 
-    def __init__(self, url: str = None, *args, **kwargs):
+    def __init__(self, url: str = None, urls: str = None, *args, **kwargs):
         super(ReutersSpider, self).__init__(*args, **kwargs)
-        self.start_urls = [url] if url else []
+        self.start_urls = split_urls(url, urls)
 
     def start_requests(self):
         for url in self.start_urls:
@@ -38,7 +39,7 @@ class ReutersSpider(Spider):
     def parse(self, response):
         item = NewsItem()
         item['url'] = response.url
-        item['job_id'] = self._job
+        item['job_id'] = response.meta.get('job_id') or getattr(self, '_job', None)
 
         # Получаем заголовок статьи с помощью XPath
         item['title'] = response.xpath(
@@ -4,6 +4,7 @@ from bs4 import BeautifulSoup
 from scrapy import Spider, Request
 from ..items import NewsItem
 from ..utils.html_cleaner import clean_html
+from ..utils.urls import split_urls
 
 class SemaforSpider(Spider):
     name = "semafor_spider"
@@ -13,10 +14,10 @@ class SemaforSpider(Spider):
     }
     ua = UserAgent()
 
-    def __init__(self, url: str = None, _job: str = None, *args, **kwargs):
+    def __init__(self, url: str = None, urls: str = None, _job: str = None, *args, **kwargs):
         # Scrapyd передаёт здесь _job=<jobid>
         super().__init__(*args, **kwargs)
-        self.start_urls = [url] if url else []
+        self.start_urls = split_urls(url, urls)
         self._job = _job     # сохраняем job_id для пайплайнов
 
     def start_requests(self):
@@ -54,7 +55,7 @@ class SemaforSpider(Spider):
         )
         # и если нужно, простая замена тегов
         cleaned_html = cleaned_html.replace('<h2>', '<h3>').replace('</h2>', '</h3>')
-        item['job_id'] = self._job
+        item['job_id'] = response.meta.get('job_id') or getattr(self, '_job', None)
         item['html'] = cleaned_html
         item['text'] = clean_html(cleaned_html)
 
@@ -0,0 +1,55 @@
+import aiohttp
+
+from telegraph.exceptions import TelegraphException
+from telegraph.utils import html_to_nodes, json_dumps
+
+
+TELEGRAPH_API_URL = 'https://api.telegra.ph/createPage'
+
+
+class TelegraphPublisher:
+    """
+    Одна попытка createPage на keep-alive сессии процесса краулера.
+    Повторов и ожидания FLOOD_WAIT здесь нет: статью, которую не удалось
+    опубликовать, публикует API (задача publish) своим клиентом
+    services.publish.TelegraphClient, он один на проект.
+    """
+
+    def __init__(self, access_token=None, pool_size=10, timeout=30):
+        self.access_token = access_token
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.session = None
+
+    def get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    async def create_page(self, title, content):
+        # content is a list of Telegraph nodes, see build_content
+        values = {'title': title, 'content': json_dumps(content)}
+        if self.access_token:
+            values['access_token'] = self.access_token
+        async with self.get_session().post(
+            TELEGRAPH_API_URL, data=values
+        ) as response:
+            response.raise_for_status()
+            data = await response.json(content_type=None)
+        if not data.get('ok'):
+            raise TelegraphException(data.get('error'))
+        return data['result']
+
+
+def build_content(html, source_url):
+    # HTML статьи со ссылкой на источник в узлах Telegraph
+    return html_to_nodes(
+        f'{html}<p>Источник: <a href="{source_url}">{source_url}</a></p>'
+    )
@@ -0,0 +1,25 @@
+import time
+from datetime import datetime
+
+
+def add_stage(item, stage, started, finished=None, error=None):
+    """
+    Добавляет к статье замер стадии (время в секундах time.time()).
+    TracePipeline пишет их в stage_timing вместе с trace_id статьи.
+    """
+    stages = item.get('stages') or []
+    stages.append((stage, started, finished or time.time(), error))
+    item['stages'] = stages
+
+
+def stage_rows(item):
+    # Строки для stage_timing, время в UTC как у API
+    return [{
+        'item_id': item['id'],
+        'trace_id': item.get('trace_id'),
+        'stage': stage,
+        'started_at': datetime.utcfromtimestamp(started),
+        'finished_at': datetime.utcfromtimestamp(finished),
+        'duration': finished - started,
+        'error': error,
+    } for stage, started, finished, error in item.get('stages') or []]
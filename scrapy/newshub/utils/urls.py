@@ -0,0 +1,11 @@
+def split_urls(url=None, urls=None):
+    """
+    Список стартовых URL из аргументов паука: url - одна ссылка,
+    urls - несколько через перевод строки или пробел (так их передаёт
+    массовое планирование API одной задачей scrapyd).
+    """
+    start_urls = [url] if url else []
+    if urls:
+        start_urls.extend(urls.split())
+    # Без повторов, в исходном порядке
+    return list(dict.fromkeys(start_urls))
@@ -0,0 +1,256 @@
+# scrapy/newshub/worker.py
+"""
+Постоянный краулер: один процесс Scrapy держит пауков открытыми
+и забирает статьи из очереди в таблице item (status NEW), вместо того
+чтобы scrapyd запускал новый процесс на каждую ссылку.
+
+Запуск из каталога проекта (рядом со scrapy.cfg):
+    python -m newshub.worker
+
+API должен работать с CRAWL_MODE=worker, иначе статьи будут
+запускаться ещё и через scrapyd.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from scrapy import signals
+from scrapy.crawler import CrawlerRunner
+from scrapy.exceptions import DontCloseSpider
+from scrapy.utils.defer import deferred_from_coro, maybe_deferred_to_future
+from scrapy.utils.log import configure_logging
+from scrapy.utils.project import get_project_settings
+from scrapy.utils.reactor import install_reactor
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import create_async_engine
+from twisted.python.failure import Failure
+
+from .models import Item, Source, Status
+from .pipelines import async_url
+
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlWorker:
+    """
+    Держит по одному открытому пауку на spider_name: сигнал spider_idle
+    не даёт ему закрыться, а новые статьи отправляются в уже запущенный
+    движок через engine.crawl. Статьи забираются из базы
+    SELECT ... FOR UPDATE SKIP LOCKED, так что воркеров может быть
+    несколько.
+
+    Как в очереди задач API, захват - это аренда: locked_at и attempts.
+    Статьи, застрявшие в IN_PROGRESS дольше CRAWL_LOCK_TIMEOUT (воркер
+    упал, разбор ничего не вернул), забираются снова, после
+    CRAWL_MAX_ATTEMPTS попыток - FAILED. Ошибки загрузки и разбора
+    и отброшенные пайплайнами статьи сразу помечаются FAILED. Новые
+    статьи берутся, только пока в движках меньше CRAWL_MAX_PENDING
+    запросов, остальные ждут в базе, а не в памяти процесса.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.runner = CrawlerRunner(settings)
+        self.engine = create_async_engine(
+            async_url(settings.get('DATABASE_URL')), pool_size=2,
+            max_overflow=0, pool_pre_ping=True
+        )
+        self.poll_interval = settings.getfloat('CRAWL_POLL_INTERVAL', 1.0)
+        self.batch_size = settings.getint('CRAWL_BATCH_SIZE', 20)
+        self.max_pending = settings.getint('CRAWL_MAX_PENDING', 50)
+        self.lock_timeout = settings.getint('CRAWL_LOCK_TIMEOUT', 600)
+        self.max_attempts = settings.getint('CRAWL_MAX_ATTEMPTS', 3)
+        self.crawlers = {}
+
+    async def claim(self, limit):
+        # (item_id, spider_name, url, job_id, trace_id) of queued articles
+        # and of stale leases, now IN_PROGRESS
+        now = datetime.utcnow()
+        stale = and_(Item.status == Status.IN_PROGRESS,
+                     Item.locked_at < now - timedelta(seconds=self.lock_timeout))
+        statement = (select(Item.id, Item.url, Item.job_id, Item.trace_id,
+                            Item.attempts, Source.spider_name).
+                     join(Source, Source.id == Item.source_id).
+                     where(or_(Item.status == Status.NEW, stale)).
+                     order_by(Item.id).
+                     limit(limit).
+                     with_for_update(of=Item, skip_locked=True))
+        async with self.engine.begin() as conn:
+            rows = (await conn.execute(statement)).all()
+            exhausted = [row.id for row in rows
+                         if row.attempts >= self.max_attempts]
+            rows = [row for row in rows if row.attempts < self.max_attempts]
+            if exhausted:
+                logger.warning(f'Crawl gave up on items {exhausted}')
+                await conn.execute(
+                    update(Item).
+                    where(Item.id.in_(exhausted)).
+                    values(status=Status.FAILED, locked_at=None)
+                )
+            if rows:
+                await conn.execute(
+                    update(Item).
+                    where(Item.id.in_([row.id for row in rows])).
+                    values(status=Status.IN_PROGRESS, locked_at=now,
+                           attempts=Item.attempts + 1)
+                )
+        return [(row.id, row.spider_name, row.url, row.job_id, row.trace_id)
+                for row in rows]
+
+    async def fail(self, item_id, reason):
+        if not item_id:
+            return
+        logger.error(f'Crawl of item {item_id} failed: {reason}')
+        try:
+            async with self.engine.begin() as conn:
+                await conn.execute(
+                    update(Item).
+                    where(Item.id == item_id).
+                    where(Item.status == Status.IN_PROGRESS).
+                    values(status=Status.FAILED, locked_at=None)
+                )
+        except Exception as e:
+            logger.error(f'Item {item_id} not marked FAILED: {e}')
+
+    def on_request_error(self, failure):
+        # Download failed after retries or the response was an HTTP error
+        meta = failure.request.meta
+        return deferred_from_coro(
+            self.fail(meta.get('item_id'), failure.value)
+        )
+
+    def on_item_dropped(self, item, response, exception, spider):
+        return deferred_from_coro(
+            self.fail(response.meta.get('item_id'), exception)
+        )
+
+    def on_item_error(self, item, response, spider, failure):
+        return deferred_from_coro(
+            self.fail(response.meta.get('item_id'), failure.value)
+        )
+
+    def on_spider_error(self, failure, response, spider):
+        return deferred_from_coro(
+            self.fail(response.meta.get('item_id'), failure.value)
+        )
+
+    def pending(self):
+        # Requests scheduled or being downloaded and parsed by all spiders
+        count = 0
+        for crawler in self.crawlers.values():
+            slot = getattr(crawler.engine, 'slot', None) \
+                if crawler.engine else None
+            if slot is not None:
+                count += len(slot.inprogress) + len(slot.scheduler)
+        return count
+
+    async def get_crawler(self, spider_name):
+        crawler = self.crawlers.get(spider_name)
+        if crawler is not None and crawler.crawling:
+            return crawler
+        crawler = self.runner.create_crawler(spider_name)
+        opened = asyncio.get_running_loop().create_future()
+
+        def spider_opened(spider):
+            if not opened.done():
+                opened.set_result(spider)
+
+        def spider_idle(spider):
+            raise DontCloseSpider
+
+        crawler.signals.connect(spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(self.on_item_dropped,
+                                signal=signals.item_dropped)
+        crawler.signals.connect(self.on_item_error, signal=signals.item_error)
+        crawler.signals.connect(self.on_spider_error,
+                                signal=signals.spider_error)
+        def crawl_finished(result):
+            # The crawl failed or ended before the spider opened (spider
+            # __init__, open_spider of a pipeline): don't wait forever
+            if not opened.done():
+                if isinstance(result, Failure):
+                    opened.set_exception(result.value)
+                else:
+                    opened.set_exception(RuntimeError(
+                        f'Spider {spider_name} closed before opening'
+                    ))
+            return result
+
+        finished = self.runner.crawl(crawler)
+        finished.addBoth(crawl_finished)
+        # Logged here, feed() reports the failure to run()
+        finished.addErrback(lambda failure: logger.error(
+            f'Crawl {spider_name} failed: {failure.value}'
+        ))
+        await opened
+        logger.info(f'Spider {spider_name} is warm')
+        self.crawlers[spider_name] = crawler
+        return crawler
+
+    async def feed(self, spider_name, urls):
+        crawler = await self.get_crawler(spider_name)
+        spider = crawler.spider
+        for item_id, url, job_id, trace_id in urls:
+            # Spiders build requests (headers, proxy) from start_urls
+            spider.start_urls = [url]
+            for request in spider.start_requests():
+                # The long-lived dupefilter would drop a repeated article
+                crawler.engine.crawl(request.replace(
+                    dont_filter=True, errback=self.on_request_error, meta={
+                        **request.meta, 'job_id': job_id,
+                        'trace_id': trace_id, 'item_id': item_id,
+                        'request_url': url
+                    }
+                ))
+        logger.info(f'Queued {len(urls)} url for {spider_name}')
+
+    async def run(self):
+        logger.info('Crawl worker started')
+        while True:
+            free = min(self.batch_size, self.max_pending - self.pending())
+            rows = []
+            if free > 0:
+                try:
+                    rows = await self.claim(free)
+                except Exception as e:
+                    logger.error(f'Crawl queue poll failed: {e}')
+            by_spider = {}
+            for item_id, spider_name, url, job_id, trace_id in rows:
+                by_spider.setdefault(spider_name, []).append(
+                    (item_id, url, job_id, trace_id)
+                )
+            for spider_name, urls in by_spider.items():
+                try:
+                    await self.feed(spider_name, urls)
+                except Exception as e:
+                    logger.error(f'Crawl feed {spider_name} failed: {e}')
+            # A full batch may mean more is waiting, if there is room
+            if len(rows) < free or self.pending() >= self.max_pending:
+                await asyncio.sleep(self.poll_interval)
+
+    async def stop(self):
+        await maybe_deferred_to_future(self.runner.stop())
+        await self.engine.dispose()
+
+
+def main():
+    settings = get_project_settings()
+    install_reactor(settings.get('TWISTED_REACTOR'))
+    configure_logging(settings)
+
+    from twisted.internet import reactor
+
+    worker = CrawlWorker(settings)
+    deferred = deferred_from_coro(worker.run())
+    deferred.addErrback(lambda failure: logger.error(failure))
+    deferred.addBoth(lambda _: reactor.stop())
+    reactor.addSystemEventTrigger(
+        'before', 'shutdown', lambda: deferred_from_coro(worker.stop())
+    )
+    reactor.run()
+
+
+if __name__ == '__main__':
+    main()